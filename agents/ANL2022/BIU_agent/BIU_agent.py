@@ -1,7 +1,6 @@
 import logging
 import numpy as np
 from pandas import array
-from random import randint
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.ensemble import VotingRegressor
@@ -13,7 +12,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -34,6 +32,7 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from agents.template_agent.utils.opponent_model import OpponentModel
+from agents.utils.bid_sampler import BidSampler
 
 
 class BIU_agent(DefaultParty):
@@ -47,6 +46,7 @@ class BIU_agent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
+        self.bid_sampler: BidSampler = None
         self.progress: ProgressTime = None
         self.me: PartyId = None
         self.other: str = None
@@ -89,6 +89,7 @@ class BIU_agent(DefaultParty):
             )
             self.profile = profile_connection.getProfile()
             self.domain = self.profile.getDomain()
+            self.bid_sampler = BidSampler(self.profile)
             profile_connection.close()
 
             self.opponent_bid_times = []
@@ -234,21 +235,22 @@ class BIU_agent(DefaultParty):
         return all(conditions)
 
     def find_bid(self) -> Bid:
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
-
-        best_bid_score = 0.0
-        best_bid = None
-
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
-
-        return best_bid
+        # take 500 attempts to find a bid according to a heuristic score.
+        # The attempts are drawn and scored at once, this is score_bid on float
+        # utilities: only our utility with its stochastic eps determines the score.
+        indices = self.bid_sampler.sample_indices(500)
+        utilities = self.bid_sampler.utilities(indices)
+
+        transitions = np.random.randint(0, 10, size=len(indices))
+        stochastic_eps = np.zeros(len(indices))
+        stochastic_eps[(transitions == 0) & (utilities <= 0.994)] = 0.005
+        stochastic_eps[(transitions == 9) & (utilities >= 0.005)] = -0.005
+        scores = utilities + stochastic_eps
+
+        best = int(np.argmax(scores))
+        if scores[best] <= 0.0:
+            return None
+        return self.bid_sampler.encoder.decode(int(indices[best]))
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.5) -> float:
         """Calculate heuristic score for a bid
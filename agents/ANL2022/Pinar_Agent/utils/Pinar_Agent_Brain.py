@@ -1,11 +1,15 @@
 import json
 import random
+import numpy as np
 import pandas as pd
 import lightgbm as lgb
 
 from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.issuevalue.Bid import Bid
 
+from agents.utils.bid_encoder import BidEncoder
+from agents.utils.utility_table import UtilityTable
+
 
 class Pinar_Agent_Brain:
     def __init__(self):
@@ -29,11 +33,19 @@ class Pinar_Agent_Brain:
 
         self.X = pd.DataFrame()
         self.Y = pd.DataFrame()
+        self.X_rows = []
+        self.Y_rows = []
 
         self.domain = None
         self.profile = None
         self.issue_name_list = None
-        self.temEnumDict = None
+        self.bid_encoder: BidEncoder = None
+        self.utility_table: UtilityTable = None
+
+        # utilities and model features of all bids, in sorted_bids_agent order
+        self.sorted_utilities = None
+        self.sorted_features = None
+        self.lgb_prediction_cache = {}
 
         self.offers = []
         self.offers_unique = []
@@ -67,19 +79,15 @@ class Pinar_Agent_Brain:
         if bid not in self.offers_unique:
             self.offers_unique.append(bid)
             if progress_time >= 0.9:
-                self.offers_unique_sorted = sorted(self.offers_unique, key=lambda x: self.profile.getUtility(x),
+                self.offers_unique_sorted = sorted(self.offers_unique, key=lambda x: self.utility_table.utility(x),
                                                    reverse=True)
 
     def add_opponent_offer_to_self_x_and_self_y(self, bid, progress_time):
-        bid_value_array = self.get_bid_value_array_for_data_frame_usage(bid)
-        df = pd.DataFrame(bid_value_array)
-        df = self.enumerate(df)
-        self.X = pd.concat([self.X, df])
+        self.X_rows.append(self.bid_encoder.index(bid))
         if progress_time < 0.81:
             val = (float(0.99) - (float(0.14) * (float(progress_time))))
             """Y tarafına öyle bir değişken atamalıyım ki adamın utilitisi olmalı (kendi utilitime göre olsa daha mantıklı olabilir gibi şimdilik)"""
-            new = pd.DataFrame([val])
-            self.Y = pd.concat([self.Y, new])
+            self.Y_rows.append(val)
 
     def fill_domain_and_profile(self, domain, profile):
         self.domain = domain
@@ -87,31 +95,32 @@ class Pinar_Agent_Brain:
         self.reservationBid = self.profile.getReservationBid()
         if self.reservationBid is not None:
             self.reservationBid_utility = self.profile.getUtility(self.reservationBid)
-        self.issue_name_list = self.domain.getIssues()
         self.X = pd.DataFrame()
         self.Y = pd.DataFrame()
-        self.temEnumDict = self.enumerate_enum_dict()
+        self.X_rows = []
+        self.Y_rows = []
+        self.bid_encoder = BidEncoder(domain)
+        # model features are the value indices, in the issue order of the encoder
+        self.issue_name_list = self.bid_encoder.issues
         self.all_bid_list = AllBidsList(domain)
 
-        self.sorted_bids_agent = sorted(self.all_bid_list,
-                                        key=lambda x: self.profile.getUtility(x),
-                                        reverse=True)
+        # utilities and features of the whole space are computed once as arrays,
+        # bids are only created when they are actually offered
+        self.utility_table = UtilityTable(profile, self.bid_encoder)
+        order = self.utility_table.descending()
+        self.sorted_utilities = self.utility_table.all_utilities()[order]
+        self.sorted_features = self.utility_table.positions(order)
+        self.sorted_bids_agent = self.utility_table.bids(order)
         self.calculate_percantage_and_number()
         self.add_agent_first_n_bid_to_machine_learning_with_low_utility(self.sorted_bids_agent)
 
+    def _number_of_bids_greater_than(self, utility):
+        # sorted_utilities is descending, search its negation which is ascending
+        return int(np.searchsorted(-self.sorted_utilities, -float(utility), side="left"))
+
     def calculate_percantage_and_number(self):
-        numb_95 = 0
-        numb_85 = 0
-        for i in self.sorted_bids_agent:
-            utility = float(self.profile.getUtility(i))
-            if utility > float(0.95):
-                numb_95 = numb_95 + 1
-            if utility > float(0.85):
-                numb_85 = numb_85 + 1
-            else:
-                break
-        self.number_of_bid_greater_than95 = numb_95
-        self.number_of_bid_greater_than85 = numb_85
+        self.number_of_bid_greater_than95 = self._number_of_bids_greater_than(0.95)
+        self.number_of_bid_greater_than85 = self._number_of_bids_greater_than(0.85)
 
         self.percentage_of_greater_than95 = float(self.number_of_bid_greater_than95) / float(
             len(self.sorted_bids_agent))
@@ -120,40 +129,33 @@ class Pinar_Agent_Brain:
 
         self.goal_of_utility = self.get_goal_of_negoation_utility(float(self.percentage_of_greater_than85)) + float(
             0.01)
-        numb_goal_util = 0
-        self.sorted_bids_agent_df = pd.DataFrame()
-        self.sorted_bids_agent_that_greater_than_065_df = pd.DataFrame()
-        for i in self.sorted_bids_agent:
-            utility = float(self.profile.getUtility(i))
-            if utility > float(self.goal_of_utility):
-                numb_goal_util = numb_goal_util + 1
-            if utility > (float(self.goal_of_utility) - float(0.1)):
-                self.sorted_bids_agent_that_greater_than_goal_of_utility.append(i)
-                df_temp = pd.DataFrame(self.get_bid_value_array_for_data_frame_usage(i))
-                df_temp = self.enumerate(df_temp)
-                self.sorted_bids_agent_df = pd.concat([self.sorted_bids_agent_df, df_temp])
-            if utility > 0.65:
-                self.sorted_bids_agent_that_greater_than_065.append(i)
-                df_temp = pd.DataFrame(self.get_bid_value_array_for_data_frame_usage(i))
-                df_temp = self.enumerate(df_temp)
-                self.sorted_bids_agent_that_greater_than_065_df = pd.concat(
-                    [self.sorted_bids_agent_that_greater_than_065_df, df_temp])
-            else:
-                break
-        self.number_of_goal_of_utility = numb_goal_util
+        # all these sets are prefixes of the sorted bids, so they are slices
+        # of the precomputed feature matrix
+        self.number_of_goal_of_utility = self._number_of_bids_greater_than(self.goal_of_utility)
+        number_near_goal = self._number_of_bids_greater_than(float(self.goal_of_utility) - float(0.1))
+        number_065 = self._number_of_bids_greater_than(0.65)
+
+        self.sorted_bids_agent_that_greater_than_goal_of_utility = self.sorted_bids_agent[:number_near_goal]
+        self.sorted_bids_agent_df = pd.DataFrame(self.sorted_features[:number_near_goal],
+                                                 columns=self.issue_name_list)
+        self.sorted_bids_agent_that_greater_than_065 = self.sorted_bids_agent[:number_065]
+        self.sorted_bids_agent_that_greater_than_065_df = pd.DataFrame(self.sorted_features[:number_065],
+                                                                       columns=self.issue_name_list)
 
     def evaluate_opponent_utility_for_all_my_important_bid(self, progress_time):
-        self.eva_util_val_acc_to_lgb_m_with_max_bids_for_agent = []
         self.my_offered_number_of_time_from_ai = 0
         util_of_opponent = self.lgb_model.predict(self.sorted_bids_agent_that_greater_than_065_df)
 
-        for index, i in enumerate(self.sorted_bids_agent_that_greater_than_065):
-            util = float(self.profile.getUtility(i))
-            if float(self.reservationBid_utility) <= util \
-                    and (((float(0.93) - (
-                    (float(0.95) - (self.goal_of_utility - float(0.18))) * float(progress_time))) < util)
-                         and float(0.40) < util_of_opponent[index] < util - float(0.10)):
-                self.eva_util_val_acc_to_lgb_m_with_max_bids_for_agent.append(i)
+        # evaluate all candidates at once on the precomputed utilities
+        util = self.sorted_utilities[:len(util_of_opponent)]
+        min_util = float(0.93) - (float(0.95) - (self.goal_of_utility - float(0.18))) * float(progress_time)
+        selected = (float(self.reservationBid_utility) <= util) \
+            & (min_util < util) \
+            & (float(0.40) < util_of_opponent) \
+            & (util_of_opponent < util - float(0.10))
+        self.eva_util_val_acc_to_lgb_m_with_max_bids_for_agent = [
+            self.sorted_bids_agent_that_greater_than_065[index] for index in np.flatnonzero(selected)
+        ]
 
     def evaluate_data_according_to_lig_gbm(self, progress_time):
         length = len(self.offers_unique)
@@ -162,9 +164,9 @@ class Pinar_Agent_Brain:
             self.evaluate_opponent_utility_for_all_my_important_bid(progress_time)
 
     def train_machine_learning_model(self):
-        issue_list = []
-        for issue in self.domain.getIssues():
-            issue_list.append(issue)
+        issue_list = list(self.issue_name_list)
+        self.X = pd.DataFrame(self.X_rows, columns=issue_list)
+        self.Y = pd.DataFrame(self.Y_rows)
         for col in issue_list:
             self.X[col] = self.X[col].astype('int')
         self.Y = self.Y.astype('float')
@@ -182,36 +184,22 @@ class Pinar_Agent_Brain:
                 'verbose': -1
             }
         self.lgb_model = lgb.train(self.param, train_data)
+        self.lgb_prediction_cache = {}
 
     def call_model_lgb(self, bid):
         if self.lgb_model:
-            prediction = self.lgb_model.predict(self._bid_for_model_prediction_to_df(bid))
-            return float(prediction[0])
+            # is_acceptable asks for the same bid several times, predict once per model
+            if bid not in self.lgb_prediction_cache:
+                self.lgb_prediction_cache[bid] = float(self.call_model_lgb_many([bid])[0])
+            return self.lgb_prediction_cache[bid]
         else:
             return float(1)
 
-    def get_bid_value_array_for_data_frame_usage(self, bid):
-        bid_value_array = {}
-        for issue in self.issue_name_list:
-            bid_value_array[issue] = [bid.getValue(issue)]
-        return bid_value_array
-
-    def _bid_for_model_prediction_to_df(self, bid):
-        df_temp = pd.DataFrame(self.get_bid_value_array_for_data_frame_usage(bid))
-        df_temp = self.enumerate(df_temp)
-        return df_temp
-
-    def enumerate_enum_dict(self):
-        issue_enums_dict = {}
-        for issue in self.domain.getIssues():
-            temp_enums = dict((y, x) for x, y in enumerate(set(self.domain.getIssuesValues()[issue])))
-            issue_enums_dict[issue] = temp_enums
-        return issue_enums_dict
-
-    def enumerate(self, df):
-        for issue in self.domain.getIssues():
-            df[issue] = df[issue].map(self.temEnumDict[issue])
-        return df
+    def call_model_lgb_many(self, bids):
+        """Predicts the opponent utility of a batch of bids with a single model call"""
+        if self.lgb_model:
+            return self.lgb_model.predict(self.bid_encoder.ordinal_many(bids))
+        return np.ones(len(bids))
 
     def model_feature_importance(self):
         if self.lgb_model is not None:
@@ -222,14 +210,9 @@ class Pinar_Agent_Brain:
         return ""
 
     def util_add_agent_first_n_bid_to_machine_learning_with_low_utility(self, bid, ratio):
-        bid_value_array = self.get_bid_value_array_for_data_frame_usage(bid)
-        df = pd.DataFrame(bid_value_array)
-        df = self.enumerate(df)
-        self.X = pd.concat([self.X, df])
+        self.X_rows.append(self.bid_encoder.index(bid))
         util = float(float(0.2) + (float(ratio) * float(0.35)))
-        new = pd.DataFrame([util])
-
-        self.Y = pd.concat([self.Y, new])
+        self.Y_rows.append(util)
 
     def add_agent_first_n_bid_to_machine_learning_with_low_utility(self, sorted_bids_agent):
 
@@ -297,47 +280,47 @@ class Pinar_Agent_Brain:
         elif progress_time < 0.4:
             if self.number_of_bid_greater_than95 >= 8:
                 index = random.randint(self.number_of_bid_greater_than95 - 4, self.number_of_bid_greater_than95)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
             elif self.number_of_bid_greater_than95 >= 4:
                 index = random.randint(3, self.number_of_bid_greater_than95)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
             elif self.number_of_bid_greater_than95 >= 1:
                 index = random.randint(1, self.number_of_bid_greater_than95)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
             elif self.number_of_bid_greater_than85 >= 1:
                 index = random.randint(1, self.number_of_bid_greater_than85)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
         elif progress_time < 0.85:
             if self.number_of_bid_greater_than95 > 1 and self.number_of_bid_greater_than85 > 2:
                 index = random.randint(self.number_of_bid_greater_than95, self.number_of_bid_greater_than85)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
             elif self.number_of_bid_greater_than85 >= 1:
                 index = random.randint(1, self.number_of_bid_greater_than85)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
 
         elif progress_time <= 0.975:
             if self.number_of_goal_of_utility > self.number_of_bid_greater_than85:
                 index = random.randint(self.number_of_bid_greater_than85, self.number_of_goal_of_utility)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
             elif self.number_of_goal_of_utility > self.number_of_bid_greater_than95:
                 index = random.randint(self.number_of_bid_greater_than95, self.number_of_goal_of_utility)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
             elif self.number_of_goal_of_utility > 1:
                 index = random.randint(1, self.number_of_goal_of_utility)
-                if float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[index])):
+                if float(self.reservationBid_utility) < float(self.sorted_utilities[index]):
                     return self.sorted_bids_agent[index]
         elif 0.91 <= progress_time <= 0.995:
             if self.offers_unique_sorted is not None and not len(self.offers_unique_sorted) == 0:
@@ -346,6 +329,6 @@ class Pinar_Agent_Brain:
                 if float(self.reservationBid_utility) < float(util_of_bid) and float(util_of_bid) >= float(self.goal_of_utility) - float(0.03) and float(
                         self.call_model_lgb(bid)) < util_of_bid:
                     return bid
-        elif float(self.reservationBid_utility) < float(self.profile.getUtility(self.sorted_bids_agent[3])):
+        elif float(self.reservationBid_utility) < float(self.sorted_utilities[3]):
             return self.sorted_bids_agent[3]
         return self.sorted_bids_agent[0]
@@ -22,6 +22,8 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.utils.bid_encoder import BidEncoder
+
 class agentBidHistory:
     def __init__(self):
         self.bidHistory = []
@@ -63,7 +65,7 @@ class Agent007(DefaultParty):
             self.bidHistory = agentBidHistory()
             self.issues = [issue for issue in sorted(self.domain.getIssues())]
             self.num_values_in_issue = [self.domain.getValues(issue).size() for issue in self.issues]
-            self.bid_dict = self.bid_decode()
+            self.bid_encoder = BidEncoder(self.domain, bias=True)
 
         elif isinstance(data, ActionDone):  # if opponent answered (reject or accept)            
             action: Action = data.getAction()
@@ -106,25 +108,13 @@ class Agent007(DefaultParty):
         with open(f"{self.storage_dir}/data.md", "w") as f:
             f.write(data)
 
-    def bid_decode(self):
-        ''' perform decoding on the bid'''
-        bid_dict = {}
-        for bid in AllBidsList(self.domain):
-            bid_vals = tuple(self.domain.getValues(issue).getValues().index(bid.getValue(issue)) for issue in self.issues)
-            bid_dict[bid_vals] = bid
-        return bid_dict
+    def bid_decode(self, bid_vals: tuple) -> Bid:
+        ''' perform decoding on the bid, bid_vals holds the value index per issue'''
+        return self.bid_encoder.decode(bid_vals)
 
     def bid_encode(self, bid: Bid):
-        ''' perform One Hot Encoding on the bid'''
-        bid_vals = [self.domain.getValues(issue).getValues().index(bid.getValue(issue)) for issue in self.issues]
-        total_num_values = sum(self.num_values_in_issue)
-        ohe_vec = np.zeros(1+total_num_values)  # added 1 for bias
-        ohe_vec[0] = 1.0    # the bias term
-        start = 1
-        for i in range(len(self.num_values_in_issue)):
-            ohe_vec[start + bid_vals[i]] = 1.0
-            start += self.num_values_in_issue[i]
-        return ohe_vec
+        ''' perform One Hot Encoding on the bid (column 0 is the bias term)'''
+        return self.bid_encoder.encode(bid)
 
     def chooseAction(self):
         ''' Choose if to accept the last offer or make a new offer
@@ -196,7 +186,7 @@ class Agent007(DefaultParty):
                     id = np.argmax(offers)  # select best for opponent
                 value_id = values_ids[id]
             vec.append(value_id)
-        bid = self.bid_dict[tuple(vec)]
+        bid = self.bid_decode(tuple(vec))
         return bid
 
     def findNextBid(self):
@@ -8,6 +8,8 @@ from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from decimal import Decimal
 from typing import List
 
+from agents.utils.linear_additive import utility_range
+
 
 class ExtendedUtilSpace:
     """
@@ -25,14 +27,13 @@ class ExtendedUtilSpace:
         """
         Computes the fields minutil and maxUtil.
         <p>
-        TODO this is simplistic, very expensive method and may cause us to run
-        out of time on large domains.
+        The extremes of a linear additive space follow from the best and worst
+        value of every issue, see utility_range, so this is O(issues * values).
         <p>
-        Assumes that utilspace and bidutils have been set properly.
+        Assumes that utilspace has been set properly.
         """
-        range = self._bidutils.getRange()
-        self._minUtil = Decimal("0.7")*range.getMax()
-        self._maxUtil = range.getMax()
+        self._maxUtil = utility_range(self._utilspace)[1]
+        self._minUtil = Decimal("0.7")*self._maxUtil
 
         rvbid = self._utilspace.getReservationBid()
         if rvbid != None:
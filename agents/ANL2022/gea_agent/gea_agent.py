@@ -29,11 +29,11 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from agents.template_agent.utils.opponent_model import OpponentModel
+from agents.utils.bid_encoder import BidEncoder
 
 # our imports
 import numpy as np
 from sklearn import tree
-from sklearn.preprocessing import label_binarize
 import random
 
 
@@ -64,7 +64,7 @@ class GEAAgent(DefaultParty):
         self.dataX = []
         self.dataY = []
         self.data_len = 0
-        self.issue_encoder = {}
+        self.bid_encoder: BidEncoder = None
 
         # decision tree and weights
         self.decision_model = None
@@ -79,7 +79,6 @@ class GEAAgent(DefaultParty):
 
         # bid dictionaries
         self.bid_values = {}
-        self.all_issue_values = {}
 
         # bid lookup indices
         # self.lower_threshold = 0
@@ -267,17 +266,15 @@ class GEAAgent(DefaultParty):
         domain = self.profile.getDomain()
         all_bids = AllBidsList(domain)
 
-        best_bid_score = 0.0
-        best_bid = None
+        # take 500 attempts to find a bid according to a heuristic score,
+        # scored as one batch so the tree is queried only once
+        bids = [all_bids.get(randint(0, all_bids.size() - 1)) for _ in range(500)]
+        bid_scores = self.score_bids(bids)
 
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
-
-        return best_bid
+        best = int(np.argmax(bid_scores))
+        if bid_scores[best] > 0.0:
+            return bids[best]
+        return None
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
         ''' Calculate heuristic score for a bid '''
@@ -293,40 +290,35 @@ class GEAAgent(DefaultParty):
 
         return score
 
+    def score_bids(self, bids: list, alpha: float = 0.95, eps: float = 0.1) -> np.ndarray:
+        ''' Calculate heuristic scores for a batch of bids, see score_bid '''
+        progress = self.progress.get(time() * 1000)
+
+        our_utilities = np.array([float(self.profile.getUtility(bid)) for bid in bids])
+
+        time_pressure = 1.0 - progress ** (1 / eps)
+        scores = alpha * time_pressure * our_utilities
+
+        if self.decision_model is not None:
+            tree_predictions = self.decision_model.predict(self.bid_encoder.encode_many(bids))
+            scores += tree_predictions * self.opponent_agree_weight
+
+        return scores
 
     def tree_predict(self, bid: Bid) -> float:
         ''' returns acceptance estimation for the other agent '''
-        bid_data = []
-        bid_issue_values = bid.getIssueValues()
-        domain_issues = list(bid_issue_values.keys())
-        domain_issues.sort()
-        for issue in domain_issues:
-            # encode categorical data
-            issue_encoded = label_binarize([str(bid_issue_values[issue])], classes=self.all_issue_values[issue])
-            # concat current category to X
-            bid_data.extend(issue_encoded.flatten().tolist())
-
         # if the tree is trained, we can use it to predict opponent reaction
         if self.decision_model is not None:
-            tree_prediction = float(self.decision_model.predict(np.array(bid_data).reshape(1, -1)))
+            bid_data = self.bid_encoder.encode(bid, out=self.bid_encoder.buffer)
+            tree_prediction = float(self.decision_model.predict(bid_data.reshape(1, -1)))
             return tree_prediction
 
         return 0  # no knowledge
 
     def append_data_and_train_tree(self, bid: Bid, opponent_accept: int) -> None:
         ''' appends new bid to negotiation history and retrain model '''
-        bid_data = []
-        bid_issue_values = bid.getIssueValues()
-        domain_issues = list(bid_issue_values.keys())
-        domain_issues.sort()
-        for issue in domain_issues:
-            # encode categorical data
-            issue_encoded = label_binarize([str(bid_issue_values[issue])], classes=self.all_issue_values[issue])
-            # concat current category to X
-            bid_data.extend(issue_encoded.flatten().tolist())
-
         self.data_len += 1
-        self.dataX.append(bid_data)
+        self.dataX.append(self.bid_encoder.encode(bid))
         self.dataY.append(opponent_accept)
 
         # train tree if at least two samples were collected
@@ -337,10 +329,4 @@ class GEAAgent(DefaultParty):
 
     def init_bid_values(self):
         ''' must be called to binarize labels '''
-        domain = self.profile.getDomain()
-        domain_issues = domain.getIssues()
-        self.all_issue_values = {}
-        for issue in domain_issues:
-            self.all_issue_values[issue] = []
-            for value in domain.getValues(issue):
-                self.all_issue_values[issue].append(str(value))
+        self.bid_encoder = BidEncoder(self.profile.getDomain())
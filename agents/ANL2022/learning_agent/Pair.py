@@ -1,4 +1,33 @@
+import math
+
 
 class Pair:
 	vList: {}
 	type: int = -1 #-1 - An invalid value type, 0 - Discrete value, 1 - Number value
+
+	# statistics of the counts in vList, kept up to date by increment()
+	sumOfValues: int = 0
+	sumOfSquares: int = 0
+	maxValue: int = 1
+	weight: float = None
+
+	def increment(self, vs: str):
+		""" Counts one more occurrence of the value vs and updates the statistics of the counts. """
+		count: int = self.vList[vs]
+		self.vList[vs] = count + 1
+		self.sumOfValues += 1
+		self.sumOfSquares += 2 * count + 1
+		self.maxValue = max(self.maxValue, count + 1)
+		self.weight = None
+
+	def valueUtility(self, vs: str) -> float:
+		""" return the estimated utility of the value vs: its count relative to the highest count """
+		return self.vList[vs] / self.maxValue
+
+	def getWeight(self) -> float:
+		""" return the inverse std deviation of the counts, cached until the next increment """
+		if self.weight is None:
+			n: int = len(self.vList)
+			deviations: float = self.sumOfSquares - self.sumOfValues * self.sumOfValues / n
+			self.weight = 1.0 / math.sqrt((deviations + 0.1) / n)
+		return self.weight
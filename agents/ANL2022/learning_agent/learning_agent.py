@@ -418,14 +418,17 @@ class LearningAgent(DefaultParty):
                     # look for bid with max utility for opponent
                     maxOpponentUtility: float = 0.0
                     maxBid: Bid = None
+                    candidates: list = []
                     for i in range(2000):
                         i: long = randint(0, self.allBidList.size())
                         bid = self.allBidList.get(i)
-                        if self.isGood(bid) and self.isOpGood(bid):
-                            opValue = self.calcOpValue(bid)
-                            if opValue > maxOpponentUtility:
-                                maxOpponentUtility = opValue
-                                maxBid = bid
+                        if self.isGood(bid):
+                            candidates.append(bid)
+                    opThreshold: float = self.getOpThreshold()
+                    for bid, opValue in zip(candidates, self.calcOpValues(candidates)):
+                        if opValue > opThreshold and opValue > maxOpponentUtility:
+                            maxOpponentUtility = opValue
+                            maxBid = bid
                     bid = maxBid
 
                 bid = self.bestOfferBid if (self.progress.get(int(time.time() * 1000)) > 0.99) and self.isGood(
@@ -464,54 +467,51 @@ class LearningAgent(DefaultParty):
         return float(self.utilitySpace.getUtility(bid)) >= self.utilThreshold
 
     def calcOpValue(self, bid: Bid):
+        """ Estimates the utility of a bid for the opponent: the average of the estimated value utilities,
+          weighted by the inverse std deviation of the value counts of each issue.
+          The statistics of the counts are maintained by updateFreqMap, so this is O(issues).
+          """
         value: float = 0
+        sumOfWght: float = 0
 
-        issues = bid.getIssues()
-        valUtil: list = [0] * len(issues)
-        issWeght: list = [0] * len(issues)
-        k: int = 0  # index
-
-        for s in issues:
+        for s in bid.getIssues():
             p: Pair = self.freqMap[s]
-            v: Value = bid.getValue(s)
-            vs: str = self.valueToStr(v, p)
-
-            # calculate utility of value (in the issue)
-            sumOfValues: int = 0
-            maxValue: int = 1
-            for vString in p.vList.keys():
-                sumOfValues += p.vList[vString]
-                maxValue = max(maxValue, p.vList[vString])
-
-            # calculate estimated utility of the issuevalue
-            valUtil[k] = p.vList.get(vs) / maxValue
-
-            # calculate the inverse std deviation of the array
-            mean: float = sumOfValues / len(p.vList)
-            for vString in p.vList.keys():
-                issWeght[k] += pow(p.vList.get(vString) - mean, 2)
-            issWeght[k] = 1.0 / math.sqrt((issWeght[k] + 0.1) / len(p.vList))
-
-            k += 1
-
-        sumOfWght: float = 0
-        for k in range(len(issues)):
-            value += valUtil[k] * issWeght[k]
-            sumOfWght += issWeght[k]
+            issWeght: float = p.getWeight()
+            value += p.valueUtility(self.valueToStr(bid.getValue(s), p)) * issWeght
+            sumOfWght += issWeght
 
         return value / sumOfWght
 
+    def calcOpValues(self, bids: list):
+        """ Estimates the utility for the opponent of a batch of candidate bids, see calcOpValue.
+          The issue weights are looked up once for the whole batch.
+          """
+        issWeght: dict = {s: p.getWeight() for s, p in self.freqMap.items()}
+        values: list = []
+        for bid in bids:
+            value: float = 0
+            sumOfWght: float = 0
+            for s in bid.getIssues():
+                p: Pair = self.freqMap[s]
+                value += p.valueUtility(self.valueToStr(bid.getValue(s), p)) * issWeght[s]
+                sumOfWght += issWeght[s]
+            values.append(value / sumOfWght)
+        return values
+
+    def getOpThreshold(self):
+        """ return the current threshold above which a bid is considered good for the opponent """
+        index: int = int(((tSplit - 1) / (1 - tPhase) * (self.progress.get(int(
+            time.time() * 1000)) - tPhase)))
+        # change
+        return max(max(2 * self.opThreshold[index] - 1, self.opReject[index]),
+                   0.2) if self.opThreshold != None and self.opReject != None else 0.6
+
     def isOpGood(self, bid: Bid):
         if bid == None:
             return False
 
         value: float = self.calcOpValue(bid)
-        index: int = int(((tSplit - 1) / (1 - tPhase) * (self.progress.get(int(
-            time.time() * 1000)) - tPhase)))
-        # change
-        opThreshold: float = max(max(2 * self.opThreshold[index] - 1, self.opReject[index]),
-                                 0.2) if self.opThreshold != None and self.opReject != None else 0.6
-        return value > opThreshold
+        return value > self.getOpThreshold()
 
     def updateFreqMap(self, bid: Bid):
         if not (bid == None):
@@ -522,7 +522,7 @@ class LearningAgent(DefaultParty):
                 v: Value = bid.getValue(s)
 
                 vs: str = self.valueToStr(v, p)
-                p.vList[vs] = (p.vList.get(vs) + 1)
+                p.increment(vs)
 
     def valueToStr(self, v: Value, p: Pair):
         v_str: str = ""
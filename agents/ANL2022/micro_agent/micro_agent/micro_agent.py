@@ -7,7 +7,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -27,6 +26,8 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.utils.descending_bids import DescendingBidList
+
 #from agents.template_agent.utils.opponent_model import OpponentModel
 
 
@@ -52,7 +53,7 @@ class MiCROAgent(DefaultParty):
 #        self.opponent_model: OpponentModel = None
         self.logger.log(logging.INFO, "party is initialized")
         
-        self.allMyBidsSorted: list = None
+        self.allMyBidsSorted: DescendingBidList = None
         self.receivedBids = set()
         self.numUniqueProposalsMadeByMe = 0
         self.reservationValue = 0 # in ANAC 2022 the reservation value is always 0, so actually we don't really need this value.
@@ -88,10 +89,8 @@ class MiCROAgent(DefaultParty):
             
          
             #Create a sorted list containing all possible bids.
-            domain = self.profile.getDomain()
-            all_bids = AllBidsList(domain)
-            self.allMyBidsSorted = list(all_bids)
-            self.allMyBidsSorted.sort(reverse=True,key=self.profile.getUtility) 
+            #The bids are enumerated best-first on demand, so only the bids we actually propose are ever generated.
+            self.allMyBidsSorted = DescendingBidList(self.profile)
             
             #Test that it is sorted correctly.
             #for bid in self.allMyBidsSorted:
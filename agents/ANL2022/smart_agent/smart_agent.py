@@ -89,6 +89,8 @@ class SmartAgent(DefaultParty):
         self.opponent_utility_by_time = self.negotiation_data["opponent_util_by_time"]
         self.need_to_read_persistent_data = True
         self.freqMap = {}
+        # per issue: sum, sum of squares and maximum of the counts in freqMap, and the cached issue weight
+        self.freq_stats = {}
         self.MAX_SEARCHABLE_BIDSPACE = 50000
         self.utilitySpace: UtilitySpace = None
         self.all_bid_list: AllBidsList
@@ -145,6 +147,7 @@ class SmartAgent(DefaultParty):
 
                         if self.freqMap != {}:
                             self.freqMap.clear()
+                            self.freq_stats.clear()
                         issues = domain.getIssues()
                         for s in issues:
                             pair = ({}, {})
@@ -157,6 +160,7 @@ class SmartAgent(DefaultParty):
                             for v in vs:
                                 vlist[str(v)] = 0
                             self.freqMap[s] = pair
+                            self.freq_stats[s] = {"sum": 0, "squares": 0, "max": 1, "weight": None}
                         self.utilitySpace: UtilitySpace.UtilitySpace = self.profileInt.getProfile()
                         self.all_bid_list = AllBidsList(domain)
 
@@ -274,7 +278,13 @@ class SmartAgent(DefaultParty):
                 p = self.freqMap.get(s)
                 v = bid.getValue(s)
                 vList = p[1]
-                vList[str(v)] += 1
+                count = vList[str(v)]
+                vList[str(v)] = count + 1
+                stats = self.freq_stats[s]
+                stats["sum"] += 1
+                stats["squares"] += 2 * count + 1
+                stats["max"] = max(stats["max"], count + 1)
+                stats["weight"] = None
 
     def opponent_action(self, action):
         """Process an action that was received from the opponent.
@@ -379,30 +389,46 @@ class SmartAgent(DefaultParty):
         # # own_utility = self.profile.getProfile().getUtility(bid)
         # opponent_utility = self.opponent_model.get_predicted_utility(bid)  # .getUtility(bid)
         # return opponent_utility
-        value = 0
-        issues = bid.getIssues()
-        valUtil = [0.0]*len(issues)
-        isWeght = [0.0]*len(issues)
-        k = 0
-        for s in issues:
-            p = self.freqMap.get(s)
-            v = bid.getValue(s)
-            sumOfValues = 0
-            maxValue = 1
-            for vString in p[1].keys():
-                sumOfValues += p[1].get(vString)
-                maxValue = max(maxValue, p[1].get(vString))
-            valUtil[k] = float(p[1].get(vString)/maxValue)
-            mean = float(sumOfValues/len(p[1]))
-            for vString in p[1].keys():
-                isWeght[k] += math.pow(p[1].get(vString) - mean, 2)
-            isWeght[k] = 1.0/(math.sqrt(isWeght[k] + 0.1)/len(p[1]))
-            k += 1
-        sumOfwght = 0
-        for k in range(0, len(issues)):
-            value += valUtil[k] * isWeght[k]
-            sumOfwght += isWeght[k]
-        return value/sumOfwght
+        return self.calc_opponnets_values([bid])[0]
+
+    def calc_opponnets_values(self, bids):
+        """Estimates the opponent utility of a batch of bids from the frequency map.
+
+        The count statistics are kept up to date by update_frequency_map, so the
+        value utility and weight of every issue are computed once for the whole
+        batch instead of by scanning all counts for every bid.
+
+        Args:
+            bids (list[Bid]): bids to evaluate
+
+        Returns:
+            list[float]: estimated opponent utility of every bid
+        """
+        val_util = {}
+        is_weght = {}
+        for s, p in self.freqMap.items():
+            stats = self.freq_stats[s]
+            # the utility is estimated from the count of the last value of the issue
+            val_util[s] = float(next(reversed(p[1].values())) / stats["max"])
+            is_weght[s] = self._issue_weight(s)
+        values = []
+        for bid in bids:
+            value = 0
+            sumOfwght = 0
+            for s in bid.getIssues():
+                value += val_util[s] * is_weght[s]
+                sumOfwght += is_weght[s]
+            values.append(value/sumOfwght)
+        return values
+
+    def _issue_weight(self, issue):
+        """Inverse spread of the value counts of an issue, cached until the next update."""
+        stats = self.freq_stats[issue]
+        if stats["weight"] is None:
+            n = len(self.freqMap[issue][1])
+            deviations = stats["squares"] - stats["sum"] * stats["sum"] / n
+            stats["weight"] = 1.0/(math.sqrt(deviations + 0.1)/n)
+        return stats["weight"]
 
     def is_opponents_proposal_is_good(self, bid: Bid):
         if bid == None:
@@ -3,6 +3,7 @@ import math
 import os.path
 import random
 import pickle
+from bisect import bisect_left
 from time import time
 from typing import cast
 from collections import defaultdict
@@ -86,6 +87,8 @@ class SuperAgent(DefaultParty):
         self._all_bid_list: AllBidsList = None
         self._sorted_bid_list: List = None
         self._len_sorted_bid_list: int = 0
+        # negated utilities of _sorted_bid_list, ascending, for binary searches on utility
+        self._sorted_neg_utilities: List = None
         self._storage_dir: str = None
 
     def create_empty_negotiation_data(self, opponent_name):
@@ -116,14 +119,9 @@ class SuperAgent(DefaultParty):
             self._persistent_data: PersistentData = PersistentData()
 
     def first_better_then(self, utility):
-        idx = None
-        try:
-            idx = next(len(self._sorted_bid_list) - 1 - x for x, val in enumerate(self._sorted_bid_list[-1::-1]) if
-                               self.calc_utility(val) > utility)
-        except StopIteration:
-            pass
-        finally:
-            return idx
+        # index of the last bid with utility strictly above the given utility, None if there is none
+        count = bisect_left(self._sorted_neg_utilities, -utility)
+        return count - 1 if count > 0 else None
 
     def last_bids(self, good_bid: int):
         # this session's max utility got
@@ -209,8 +207,10 @@ class SuperAgent(DefaultParty):
 
                 self._utility_space = self._profile_interface.getProfile()
                 self._all_bid_list: AllBidsList = AllBidsList(domain=self._domain)
-                self._sorted_bid_list = sorted(AllBidsList(domain=self._domain),
-                                               key=self._utility_space.getUtility, reverse=True)
+                sorted_bid_utilities = sorted(((bid, self._utility_space.getUtility(bid)) for bid in self._all_bid_list),
+                                              key=lambda bid_utility: bid_utility[1], reverse=True)
+                self._sorted_bid_list = [bid for bid, _ in sorted_bid_utilities]
+                self._sorted_neg_utilities = [-utility for _, utility in sorted_bid_utilities]
                 self._len_sorted_bid_list = len(self._sorted_bid_list)
                 # after sort of bid list the optimal bid is in the first element
                 self._optimal_bid = self._sorted_bid_list[0]
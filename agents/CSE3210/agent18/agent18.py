@@ -4,7 +4,7 @@ import random
 from random import randint, choices
 from typing import cast
 
-import geniusweb.opponentmodel.FrequencyOpponentModel as freq_opp_mod
+import agents.utils.frequency_opponent_model as freq_opp_mod
 import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
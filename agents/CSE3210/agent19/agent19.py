@@ -3,14 +3,12 @@ import time
 from random import randint
 from typing import cast
 import random
-import functools
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.ActionWithBid import ActionWithBid
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -31,6 +29,8 @@ from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 import numpy as np
 
+from agents.utils.utility_table import UtilityTable
+
 
 class Acceptinator:
     def __init__(self, bid_window, acceptance_threshold, trajectory_threshold):
@@ -132,6 +132,7 @@ class Agent19(DefaultParty):
         self._profile = None
         self._last_received_bid: Bid = None
         self._sortedList = None
+        self._sortedUtilities = None
         self._opponent = None
         self._opponentAction = None
         self.counter = 0
@@ -265,113 +266,51 @@ class Agent19(DefaultParty):
         return profile.getUtility(bid) > 0.6 + 0.4 * (1 - progress)
 
     def _findBid(self) -> Bid:
-        # compose a list of all possible bids
-
-        domain = self._profile.getProfile().getDomain()
-        profile = self._profile.getProfile()
         progress = self._progress.get(1)
 
         if (self._sortedList == None):
-            """Sort the list. Highest utility first"""
-            all_bids = AllBidsList(domain)
-            self._sortedList = sorted(all_bids, key=functools.cmp_to_key(
-                lambda bid1, bid2: profile.getUtility(bid2) - profile.getUtility(bid1)))
-
+            """Sort the list once. Highest utility first"""
+            profile = self._profile.getProfile()
+            table = UtilityTable(profile)
+            order = table.descending()
+            self._sortedList = table.bids(order)
+            self._sortedUtilities = table.all_utilities()[order]
+
+        best = self._sortedUtilities[0]
         if (progress <= 0.2):
-            bestBids = [x for x in self._sortedList if (profile.getUtility(x) >= float(
-                profile.getUtility(self._sortedList[0])) * 0.95 and profile.getUtility(x) <= profile.getUtility(
-                self._sortedList[0]))]
-            bid = random.choice(bestBids)
+            bid = self._sortedList[randint(0, self._countAtLeast(best * 0.95) - 1)]
 
         elif (progress > 0.2 and progress <= 0.3):
-
-            bestBids = [x for x in self._sortedList if (profile.getUtility(x) >= float(
-                profile.getUtility(self._sortedList[0])) * 0.9 and profile.getUtility(x) <= profile.getUtility(
-                self._sortedList[0]))]
-            bid = random.choice(bestBids)
+            bid = self._sortedList[randint(0, self._countAtLeast(best * 0.9) - 1)]
 
         elif (progress > 0.3 and progress <= 0.4):
-            bestBids = [x for x in self._sortedList if (profile.getUtility(x) >= float(
-                profile.getUtility(self._sortedList[0])) * 0.85 and profile.getUtility(x) <= profile.getUtility(
-                self._sortedList[0]))]
-            bid = random.choice(bestBids)
+            bid = self._sortedList[randint(0, self._countAtLeast(best * 0.85) - 1)]
 
         elif (progress > 0.4 and progress <= 0.65):
             if (self.bestBidsFirst == None):
-                bestBids = [x for x in self._sortedList if (profile.getUtility(x) >= float(
-                    profile.getUtility(self._sortedList[0])) * 0.8 and profile.getUtility(x) < 0.95)]
-                self.bestBidsFirst = [x for x in bestBids if
-                                      (self._opponent.getUtility(x) >= 0.35 and self._opponent.getUtility(x) < 0.95)]
-                self.bestBidsFirst = sorted(self.bestBidsFirst, key=functools.cmp_to_key(
-                    lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                util = 0.35
-                while (len(self.bestBidsFirst) < 2):
-                    self.bestBidsFirst = [x for x in bestBids if (
-                                self._opponent.getUtility(x) >= util and self._opponent.getUtility(x) < 0.95)]
-                    self.bestBidsFirst = sorted(self.bestBidsFirst, key=functools.cmp_to_key(
-                        lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                    util = util - 0.01
+                self.bestBidsFirst = self._opponentTier(best * 0.8, 0.35, 0.35, 0.01)
             length = len(self.bestBidsFirst)
             counter = random.randint(0, length - 1)
             bid = self.bestBidsFirst[counter]
 
         elif (progress > 0.65 and progress <= 0.8):
-            """Sort the list. Highest utility first and also consider opponents utility"""
+            """Highest utility first and also consider opponents utility"""
             if (self.bestBidsSecond == None):
-                bestBids = [x for x in self._sortedList if (profile.getUtility(x) >= float(
-                    profile.getUtility(self._sortedList[0])) * 0.75 and profile.getUtility(x) < 0.95)]
-                self.bestBidsSecond = [x for x in bestBids if
-                                       (self._opponent.getUtility(x) >= 0.4 and self._opponent.getUtility(x) < 0.95)]
-                self.bestBidsSecond = sorted(self.bestBidsSecond, key=functools.cmp_to_key(
-                    lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                util = 0.45
-                while (len(self.bestBidsSecond) < 2):
-                    """ Check if there are bids in bidspace according to our util and opponents. If there is not lower the util of the opponent """
-                    self.bestBidsSecond = [x for x in bestBids if (
-                                self._opponent.getUtility(x) >= util and self._opponent.getUtility(x) < 0.95)]
-                    self.bestBidsSecond = sorted(self.bestBidsSecond, key=functools.cmp_to_key(
-                        lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                    util = util - 0.025
+                self.bestBidsSecond = self._opponentTier(best * 0.75, 0.4, 0.45, 0.025)
 
             length = len(self.bestBidsSecond)
             counter = random.randint(0, length - 1)
             bid = self.bestBidsSecond[counter]
         elif (progress > 0.8 and progress <= 0.95):
             if (self.bestBidsThird == None):
-                bestBids = [x for x in self._sortedList if
-                            (profile.getUtility(x) >= 0.65 and profile.getUtility(x) < 0.95)]
-                self.bestBidsThird = [x for x in bestBids if
-                                      (self._opponent.getUtility(x) >= 0.4 and self._opponent.getUtility(x) < 0.95)]
-                self.bestBidsThird = sorted(self.bestBidsThird, key=functools.cmp_to_key(
-                    lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                util = 0.5
-                while (len(self.bestBidsThird) < 2):
-                    """ Check if there are bids in bidspace according to our util and opponents. If there is not lower the util of the opponent """
-                    self.bestBidsThird = [x for x in bestBids if (
-                                self._opponent.getUtility(x) >= util and self._opponent.getUtility(x) < 0.95)]
-                    self.bestBidsThird = sorted(self.bestBidsThird, key=functools.cmp_to_key(
-                        lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                    util = util - 0.025
+                self.bestBidsThird = self._opponentTier(0.65, 0.4, 0.5, 0.025)
 
             length = len(self.bestBidsThird)
             counter = random.randint(0, length - 1)
             bid = self.bestBidsThird[counter]
         elif (progress > 0.95 and progress <= 0.99):
             if (self.bestBidsFourth == None):
-                bestBids = [x for x in self._sortedList if
-                            (profile.getUtility(x) >= 0.60 and profile.getUtility(x) < 0.95)]
-                self.bestBidsFourth = [x for x in bestBids if
-                                       (self._opponent.getUtility(x) >= 0.5 and self._opponent.getUtility(x) < 0.95)]
-                self.bestBidsFourth = sorted(self.bestBidsFourth, key=functools.cmp_to_key(
-                    lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                util = 0.5
-                while (len(self.bestBidsFourth) < 2):
-                    """ Check if there are bids in bidspace according to our util and opponents. If there is not lower the util of the opponent """
-                    self.bestBidsFourth = [x for x in bestBids if (
-                                self._opponent.getUtility(x) >= util and self._opponent.getUtility(x) < 0.95)]
-                    self.bestBidsFourth = sorted(self.bestBidsFourth, key=functools.cmp_to_key(
-                        lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                    util = util - 0.025
+                self.bestBidsFourth = self._opponentTier(0.60, 0.5, 0.5, 0.025)
 
             length = len(self.bestBidsFourth)
             counter = random.randint(0, length - 1)
@@ -379,21 +318,37 @@ class Agent19(DefaultParty):
 
         else:
             if (self.bestBidsFifth == None):
-                bestBids = [x for x in self._sortedList if
-                            (profile.getUtility(x) >= 0.55 and profile.getUtility(x) < 0.95)]
-                self.bestBidsFifth = [x for x in bestBids if
-                                      (self._opponent.getUtility(x) >= 0.5 and self._opponent.getUtility(x) < 0.95)]
-                self.bestBidsFifth = sorted(self.bestBidsFifth, key=functools.cmp_to_key(
-                    lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                util = 0.55
-                while (len(self.bestBidsFifth) < 2):
-                    """ Check if there are bids in bidspace according to our util and opponents. If there is not lower the util of the opponent """
-                    self.bestBidsFifth = [x for x in bestBids if (
-                                self._opponent.getUtility(x) >= util and self._opponent.getUtility(x) < 0.95)]
-                    self.bestBidsFifth = sorted(self.bestBidsFifth, key=functools.cmp_to_key(
-                        lambda bid1, bid2: self._opponent.getUtility(bid2) - self._opponent.getUtility(bid1)))
-                    util = util - 0.025
+                self.bestBidsFifth = self._opponentTier(0.55, 0.5, 0.55, 0.025)
             length = len(self.bestBidsFifth)
             counter = random.randint(0, length - 1)
             bid = self.bestBidsFifth[counter]
         return bid
+
+    def _countAtLeast(self, utility) -> int:
+        """Number of bids with a utility of at least the given value, these are the first
+        ones in the sorted list"""
+        return int(np.searchsorted(-self._sortedUtilities, -utility, side="right"))
+
+    def _opponentTier(self, min_utility, opponent_utility, lowered_opponent_utility, step):
+        """Bids with min_utility <= utility < 0.95 for us that the opponent values in [opponent_utility, 0.95),
+        best for the opponent first. While less than 2 bids qualify, the opponent bound restarts at
+        lowered_opponent_utility and drops by step. Computed once per phase."""
+        # our utility bounds are an index range of the sorted list
+        candidates = self._sortedList[self._countAtLeast(0.95):self._countAtLeast(min_utility)]
+        opponent_utilities = [self._opponent.getUtility(x) for x in candidates]
+        ranking = sorted(range(len(candidates)), key=lambda i: opponent_utilities[i], reverse=True)
+
+        def tier(util):
+            return [candidates[i] for i in ranking if util <= opponent_utilities[i] < 0.95]
+
+        bids = tier(opponent_utility)
+        # lower the opponent bound by whole steps, the last step is exactly 0 so every candidate is considered
+        num_steps = int(np.ceil(lowered_opponent_utility / step))
+        for i in range(num_steps + 1):
+            if len(bids) >= 2:
+                break
+            """ Check if there are bids in bidspace according to our util and opponents. If there is not lower the util of the opponent """
+            bids = tier(max(lowered_opponent_utility - i * step, 0.0))
+        if len(bids) == 0:
+            bids = [self._sortedList[0]]
+        return bids
@@ -9,11 +9,11 @@ from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from ...time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from agents.utils.bid_sampler import BidSampler
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -45,6 +45,7 @@ class Agent2(DefaultParty):
         self._last_received_bid: Bid = None # type:ignore
         self._utilspace: UtilitySpace = None # type:ignore
         self._extendedspace: ExtendedUtilSpace = None # type:ignore
+        self._bid_sampler: BidSampler = None # type:ignore
 
         self.highest_social_welfare_bid: list[Bid] = []
 
@@ -224,12 +225,7 @@ class Agent2(DefaultParty):
     """
     Finds the maximum bid according to a certain proposition
     """
-    def _find_bid_with(self, proposition: Callable[[Bid, Bid], bool], attempts: int):
-        # compose a list of all possible bids
-        # TODO Make the selection more constrained, the frequency analyzer performs relatively well
-        #      but the amount of time it takes to find a good/nice bid can be reduced significantly
-        all_bids = AllBidsList(self._profileint.getProfile().getDomain())
-
+    def _find_bid_with(self, proposition: Callable[[Bid, Bid], bool], attempts: int, utility_margin: Decimal = None):
         # TODO Also consider doing this differently
         maxBid = self._find_lower_bid()
 
@@ -239,8 +235,14 @@ class Agent2(DefaultParty):
             else:
                 maxBid = self.highest_social_welfare_bid[-1]
 
-        for _ in range(attempts):
-            bid = self._get_random_bid(all_bids)
+        # If the proposition requires at least the utility of maxBid plus utility_margin,
+        # only draw from that utility band instead of rejecting random bids from the whole domain
+        lower_utility = -math.inf
+        if utility_margin is not None:
+            profile, _ = self._get_profile_and_progress()
+            lower_utility = float(profile.getUtility(maxBid) + utility_margin) - 1e-9
+
+        for bid in self._bid_sampler.sample(attempts, lower=lower_utility):
             maxBid = bid if proposition(bid, maxBid) else maxBid
 
         self.highest_social_welfare_bid.append(maxBid)
@@ -271,7 +273,8 @@ class Agent2(DefaultParty):
     """
     def _find_max_nice_bid(self, attempts) -> Bid:
         # some cheeky CPL currying
-        return self._find_bid_with((lambda a, b: self._is_better_bid(a, b,  self.niceness, be_nice=True) and self._is_acceptable(a, b)), attempts)
+        return self._find_bid_with((lambda a, b: self._is_better_bid(a, b,  self.niceness, be_nice=True) and self._is_acceptable(a, b)), attempts,
+                                   utility_margin=self.niceness)
 
     """
     Checks if bid a is better than bid b.
@@ -309,6 +312,7 @@ class Agent2(DefaultParty):
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
             self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            self._bid_sampler = BidSampler(self._utilspace)
 
     # ===================
     # === DEBUG TOOLS ===
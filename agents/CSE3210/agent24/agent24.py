@@ -1,4 +1,3 @@
-import decimal
 import logging
 import time
 from random import randint
@@ -9,7 +8,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -29,6 +27,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.utility_table import UtilityTable
+
 
 
 class Agent24(DefaultParty):
@@ -48,6 +48,9 @@ class Agent24(DefaultParty):
         self._frequency_matrix = []
         self._previous_bid_enemy = 1
         self._previous_bid_self = 1
+        # all bids sorted on ascending utility, with their utilities
+        self._sorted_bids = None
+        self._sorted_utilities = None
 
     def notifyChange(self, info: Inform):
 
@@ -183,23 +186,32 @@ class Agent24(DefaultParty):
         return progress >= 0.99 and profile.getUtility(bid) > reservation
 
     def _findBid(self, utility) -> Bid:
-        # compose a list of all possible bids
-        changed_utility = self._previous_bid_enemy - utility
+        # index all possible bids on utility once
+        if self._sorted_bids is None:
+            table = UtilityTable(self._profile.getProfile())
+            order = np.argsort(table.all_utilities(), kind="stable")
+            self._sorted_bids = table.bids(order)
+            self._sorted_utilities = table.all_utilities()[order]
 
-        domain = self._profile.getProfile().getDomain()
-        profile = self._profile.getProfile()
-        all_bids = AllBidsList(domain)
-
-        found = False
-        for _ in range(5000):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            if -0.2 < decimal.Decimal(self._previous_bid_self) - profile.getUtility(bid) - (decimal.Decimal(changed_utility) * decimal.Decimal(0.3)) < 0.05 and self._previous_bid_self - profile.getUtility(bid) < 0.1:
-                found = True
-                break
-        if not found:
-            for _ in range(5000):
-                bid = all_bids.get(randint(0, all_bids.size() - 1))
-                if self._previous_bid_self - profile.getUtility(bid) < 0.1:
-                    break
-        self._previous_bid_self = profile.getUtility(bid)
-        return bid
+        changed_utility = self._previous_bid_enemy - utility
+        previous = float(self._previous_bid_self)
+
+        # a random bid with -0.2 < previous - u - 0.3 * changed_utility < 0.05 and previous - u < 0.1
+        lower = max(previous - 0.3 * changed_utility - 0.05, previous - 0.1)
+        upper = previous - 0.3 * changed_utility + 0.2
+        first, end = self._utilityWindow(lower, upper)
+        if first >= end:
+            # otherwise any bid with previous - u < 0.1
+            first, end = self._utilityWindow(previous - 0.1, np.inf)
+        if first >= end:
+            first, end = 0, len(self._sorted_bids)
+
+        index = randint(first, end - 1)
+        self._previous_bid_self = float(self._sorted_utilities[index])
+        return self._sorted_bids[index]
+
+    def _utilityWindow(self, lower, upper):
+        """index range [first, end) of the sorted bids with lower < utility < upper"""
+        first = int(np.searchsorted(self._sorted_utilities, lower, side="right"))
+        end = int(np.searchsorted(self._sorted_utilities, upper, side="left"))
+        return first, end
@@ -1,6 +1,7 @@
 import logging
 import random
 import time
+from bisect import bisect_left
 from typing import cast, Dict, List, Union
 
 from geniusweb.actions.Accept import Accept
@@ -50,6 +51,8 @@ class Agent25(DefaultParty):
         self._best_bid = None
 
         self._all_bids: List[(float, Dict[str, Value])] = []
+        # Negated utilities of _all_bids, ascending so they can be searched with bisect.
+        self._all_bids_neg_utilities: List[float] = []
 
         self._min_utility: Union[float, None] = None
         self._max_utility: Union[float, None] = None
@@ -105,6 +108,7 @@ class Agent25(DefaultParty):
 
                 # Sorts by highest utility first.
                 self._all_bids = sorted(self._all_bids, key=lambda x: x[0], reverse=True)
+                self._all_bids_neg_utilities = [-x[0] for x in self._all_bids]
 
                 self._max_utility = self._all_bids[0][0]
                 self._min_utility = self._all_bids[len(self._all_bids) - 1][0]
@@ -235,6 +239,25 @@ class Agent25(DefaultParty):
 
         raise Exception("Can not handle this type of profile")
 
+    # Index of the first bid in _all_bids with the utility closest to the given utility.
+    # If two utilities are equally close, the highest one is used.
+    def _closest_bid_index(self, utility: float) -> int:
+        neg_utilities = self._all_bids_neg_utilities
+
+        # Bids before index 'below' have a utility above the target.
+        below = bisect_left(neg_utilities, -utility)
+        if below == len(neg_utilities):
+            closest = below - 1
+        elif below == 0:
+            return below
+        elif abs(-neg_utilities[below - 1] - utility) <= abs(-neg_utilities[below] - utility):
+            closest = below - 1
+        else:
+            return below
+
+        # First occurrence of the closest utility above the target.
+        return bisect_left(neg_utilities, neg_utilities[closest])
+
     # Creates a new bid to offer.
     def _create_bid(self) -> Bid:
         time_modifier = self._session_progress.get(int(time.time())) ** self._offer_concession_param
@@ -246,8 +269,7 @@ class Agent25(DefaultParty):
         ideal_utility = ideal_utility * (self._max_utility - self._min_utility)
         ideal_utility = ideal_utility + self._min_utility
 
-        closest_bid = min(self._all_bids, key=lambda x: abs(x[0] - ideal_utility))
-        closest_bid_index = [y[0] for y in self._all_bids].index(closest_bid[0])
+        closest_bid_index = self._closest_bid_index(ideal_utility)
 
         # Bids we can make this round which give the agent a utility close to the ideal utility.
         possible_bids = self._all_bids[
@@ -12,8 +12,6 @@ import geniusweb
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
-from geniusweb.bidspace.Interval import Interval
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -32,6 +30,10 @@ import datetime
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+import numpy as np
+
+from agents.utils.utility_table import UtilityTable
+
 
 class Agent26(DefaultParty):
 
@@ -50,6 +52,12 @@ class Agent26(DefaultParty):
         self._round_times: list[Decimal] = []
         self._last_time = None
         self._avg_time = None
+        # Bid space sorted on utility, built once per session
+        self._utility_table: UtilityTable = None
+        self._sorted_indices: np.ndarray = None
+        self._sorted_utilities: np.ndarray = None
+        # How often the opponent offered each value, indexed by one-hot column
+        self._received_counts: np.ndarray = None
 
     def notifyChange(self, info: Inform):
         """This is the entry point of all interaction with your agent after is has been initialised.
@@ -75,6 +83,13 @@ class Agent26(DefaultParty):
             if self._profile.getProfile().getReservationBid() is not None:
                 self._reservation = self._profile.getProfile().getReservationBid()
 
+            # Sort all bids on utility once, so every turn only has to search the sorted utilities
+            self._utility_table = UtilityTable(self._profile.getProfile())
+            utilities = self._utility_table.all_utilities()
+            self._sorted_indices = np.argsort(utilities, kind="stable")
+            self._sorted_utilities = utilities[self._sorted_indices]
+            self._received_counts = np.zeros(self._utility_table.encoder.num_columns)
+
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
             action: Action = cast(ActionDone, info).getAction()
@@ -135,6 +150,7 @@ class Agent26(DefaultParty):
                     self.offers_received[(issue, self._last_received_bid.getValue(issue))] += 1
                 else:
                     self.offers_received[(issue, self._last_received_bid.getValue(issue))] = 1
+            self._received_counts[self._utility_table.encoder.columns(self._last_received_bid)] += 1
 
         # For calculating average time per round
         if self._last_time is not None:
@@ -174,25 +190,24 @@ class Agent26(DefaultParty):
 
     def _findBid(self) -> Bid:
         progress = self._progress.get(1)
-        bids_with_utility = BidsWithUtility.create(self._profile.getProfile(), 5)
         # Calculate the maximum utility (self._accept is the minimum utility we accept calculated by
         # time dependent formula)
         max_bid = self._accept + self._range
-        # Select the bids between min and max utility
-        all_bids = bids_with_utility.getBids(Interval(Decimal(self._accept), Decimal(max_bid)))
+        # Select the bids between min and max utility, as a [start, end) range of the sorted bids
+        start, end = self._bidRange(self._accept, max_bid)
         # If there is less than 10 bids in this range we decrease the minimum utility
-        while all_bids.size() < 10:
+        while end - start < 10:
             self._accept -= self._range
-            all_bids = bids_with_utility.getBids(Interval(Decimal(self._accept), Decimal(max_bid)))
+            start, end = self._bidRange(self._accept, max_bid)
             if self._accept <= 0:
                 break
 
-        if all_bids.size() == 0:
+        if end == start:
             return self._most_similar
 
         # Set the best bid to a random bid or global most similar
         if self._most_similar is None:
-            best_bid = all_bids.get(randint(0, all_bids.size() - 1))
+            best_bid = self._bidAt(randint(start, end - 1))
         else:
             best_bid = self._most_similar
         # We create a random integer for using as probability
@@ -200,7 +215,7 @@ class Agent26(DefaultParty):
 
         # Return random 10 percent chance
         if probability >= 90:
-            return all_bids.get(randint(0, all_bids.size() - 1))
+            return self._bidAt(randint(start, end - 1))
 
         # This loop calculates the new points for our global most similar bid
         most_similar_sum = 0
@@ -216,36 +231,28 @@ class Agent26(DefaultParty):
         # This is the strategy used after low progress strategy
         if progress > 0.05:
 
-            max_points = 0
-            # Loop over all the bids in the range
-            for bid in all_bids:
-
-                points = 0
+            # Give points to all bids in the range depending on how many times the opponent offered
+            # their issue values: the one-hot rows of the bids dotted with the received value counts
+            columns = self._utility_table.positions(self._sorted_indices[start:end]) \
+                + np.array(self._utility_table.encoder.offsets)
+            points = self._received_counts[columns].sum(axis=1)
+            # The first bid with the most points
+            most_points = int(np.argmax(points))
 
-                # Loop over issues in a bid
-                for k, v in bid.getIssueValues().items():
-                    if (k, v) in self.offers_received:
-                        # Give points to the bid depending on how many times an issue with a specific
-                        # value is offered by the opponent
-                        points += self.offers_received[(k, v)]
+            # Check if any of the bids is more similar than our old most similar bid
+            if points[most_points] > most_similar_sum:
+                self._most_similar = self._bidAt(start + most_points)
+                # return most similar bid 45 percent chance
+                best_bid = self._most_similar
 
-                # Check if any of the bids is more similar than our old most similar bid
-                if points > most_similar_sum:
-                    self._most_similar = bid
-                    most_similar_sum = points
-                    # return most similar bid 45 percent chance
-                    best_bid = self._most_similar
-
-                # Return the best bid in the range 45 percent chance
-                if probability >= 45:
-                    if points > max_points:
-                        best_bid = bid
-                        max_points = points
+            # Return the best bid in the range 45 percent chance
+            if probability >= 45 and points[most_points] > 0:
+                best_bid = self._bidAt(start + most_points)
 
         # If progress is too low, we use random strategy
         else:
             points = 0
-            new_bid = all_bids.get(randint(0, all_bids.size() - 1))
+            new_bid = self._bidAt(randint(start, end - 1))
             # Calculates the points of new bid
             for k, v in new_bid.getIssueValues().items():
                 if (k, v) in self.offers_received:
@@ -259,6 +266,14 @@ class Agent26(DefaultParty):
 
         return best_bid
 
+    def _bidRange(self, min_utility, max_utility) -> tuple:
+        """Returns the [start, end) range of the sorted bids with min_utility <= utility <= max_utility."""
+        return (int(np.searchsorted(self._sorted_utilities, min_utility, side="left")),
+                int(np.searchsorted(self._sorted_utilities, max_utility, side="right")))
+
+    def _bidAt(self, position: int) -> Bid:
+        return self._utility_table.encoder.decode(int(self._sorted_indices[position]))
+
     @staticmethod
     def alpha_time(t, t_max, beta, initial_value=0):
         return initial_value + (1 - initial_value) * ((min(t, t_max) / t_max) ** (1 / beta))
@@ -3,13 +3,11 @@ import time
 from decimal import Decimal
 
 import numpy as np
-from random import randint
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -24,6 +22,9 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.bid_sampler import BidSampler
+from agents.utils.utility_table import BidSequence
+
 
 class Agent29(DefaultParty):
     """
@@ -58,8 +59,7 @@ class Agent29(DefaultParty):
         self._log_times.insert(0, 0)
         self._e = 1.0
         self._last_ten_bids_counts = {}
-        self._all_possible_bids: AllBidsList
-        self._all_possible_bids_utils = []
+        self._bid_sampler: BidSampler = None
         self._all_possible_bids_ord: list[Bid] = []
         self._all_possible_bids_ord_utils = []
         self._num_possible_bids = 0
@@ -281,19 +281,10 @@ class Agent29(DefaultParty):
     """
 
     def initialise_all_possible_bids(self):
-        domain = self._profile.getProfile().getDomain()
-        self._all_possible_bids = AllBidsList(domain)
-        for i in range(self._all_possible_bids.size()):
-            current_bid = self._all_possible_bids.get(i)
-            self._all_possible_bids_utils.append(self._profile.getProfile().getUtility(current_bid))
-        self._all_possible_bids_utils = np.array(self._all_possible_bids_utils)
-        sort_indices = np.argsort(self._all_possible_bids_utils)
-        for i in range(self._all_possible_bids.size()):
-            self._all_possible_bids_ord.append(self._all_possible_bids.get(sort_indices[i]))
-
-        self._all_possible_bids_ord_utils = self._all_possible_bids_utils[sort_indices]
-        self._all_possible_bids_ord_utils = self._all_possible_bids_ord_utils = \
-            self._all_possible_bids_ord_utils.astype('float')
+        # the sampler sorts the bid space on utility once, the ordered bids are decoded lazily
+        self._bid_sampler = BidSampler(self._profile.getProfile())
+        self._all_possible_bids_ord = self._bid_sampler.ascending()
+        self._all_possible_bids_ord_utils = self._bid_sampler.ascending_utilities()
 
     """
     Initializes a reservation value, if a Reservation Bid is defined in the profile. 
@@ -332,35 +323,28 @@ class Agent29(DefaultParty):
             self._last_ten_bids_counts[issue][opp_bid_value] -= 1
 
     """
-    Return a number between 0 and 1 indicating how close the given bid is to the current opponent preference model.
+    Weights of the one-hot bid columns of the sampler's encoder, such that a bid's row times the weights is a number
+    between 0 and 1 indicating how close the bid is to the current opponent preference model.
     """
 
-    def domain_similarity(self, bid: Bid):
-        domain = self._profile.getProfile().getDomain()
-        domain_issues = domain.getIssues()
-        num_issues = len(domain_issues)
-
-        similarity = 0.
-
-        for issue in domain_issues:
-            opp_bid_value = bid.getValue(issue)
-            similarity += (self._last_ten_bids_counts[issue][opp_bid_value] / 10.0) / num_issues
-
-        return similarity
+    def domain_similarity_weights(self) -> np.ndarray:
+        encoder = self._bid_sampler.encoder
+        weights = np.zeros(encoder.num_columns)
+        for issue, values, offset in zip(encoder.issues, encoder.values, encoder.offsets):
+            for position, value in enumerate(values):
+                weights[offset + position] = self._last_ten_bids_counts[issue][value]
+        return weights / (10.0 * len(encoder.issues))
 
     """
     Sort the given bids by how close they are to our opponent's preference model (histograms).
+    The bids are scored at once from their one-hot encoding, without decoding them.
     """
 
-    def sort_bids_by_similarity(self, bids_to_consider) -> list[Bid]:
-        bid_similarities = []
-        for i in bids_to_consider:
-            bid_similarities.append(self.domain_similarity(i))
+    def sort_bids_by_similarity(self, bids_to_consider: BidSequence) -> BidSequence:
+        bid_similarities = self._bid_sampler.encode(bids_to_consider.indices) @ self.domain_similarity_weights()
 
         bid_similarities_sort_index = np.argsort(bid_similarities)[::-1]
-        sorted_bids = np.array(bids_to_consider)[bid_similarities_sort_index]
-
-        return sorted_bids
+        return self._bid_sampler.table.bids(bids_to_consider.indices[bid_similarities_sort_index])
 
     """
     Iterates over the array of bids sorted by similarity and tries to pick the first that hasn't been offered yet.
@@ -435,12 +419,9 @@ class Agent29(DefaultParty):
     From the given list of bids, remove all those that cannot be offered because of utility below reservation value.
     """
 
-    def remove_bids_below_reservation(self, bids_to_consider):
-        acceptable_bids = []
-        for i in range(len(bids_to_consider)):
-            if self._profile.getProfile().getUtility(bids_to_consider[i]) >= self._reservation_value:
-                acceptable_bids.append(bids_to_consider[i])
-        return acceptable_bids
+    def remove_bids_below_reservation(self, bids_to_consider: BidSequence) -> BidSequence:
+        acceptable = [self._profile.getProfile().getUtility(bid) >= self._reservation_value for bid in bids_to_consider]
+        return self._bid_sampler.table.bids(bids_to_consider.indices[np.array(acceptable, dtype=bool)])
 
     """
     From all possible bids, choose the one with lowest utility that is higher than the reservation value.
@@ -459,13 +440,17 @@ class Agent29(DefaultParty):
     """
 
     def find_random_acceptable_bid(self, best_bid, best_bid_util, attempts=100):
-        for _ in range(attempts):
-            bid = self._all_possible_bids.get(randint(0, self._all_possible_bids.size() - 1))
-            if self._isGoodDomainAgent(bid):  # if the bid is good, offer it
-                best_bid = bid
-                break
-            # if the bid is not good but better than the best so far, update it
-            if self._profile.getProfile().getUtility(bid) > best_bid_util:
-                best_bid = bid
-                best_bid_util = self._profile.getProfile().getUtility(bid)
+        # draw the attempts from the bids that can be good, the band is slightly widened
+        # because the sampler compares float utilities
+        lower_util = max(0.8, float(self._reservation_value)) - 1e-9
+        for bid in self._bid_sampler.sample(attempts, lower=lower_util):
+            if self._isGoodDomainAgent(bid):
+                return bid
+
+        # no good bid was drawn, offer the best of random bids if it beats the given bid
+        indices = self._bid_sampler.sample_indices(attempts)
+        utilities = self._bid_sampler.utilities(indices)
+        best = int(np.argmax(utilities))
+        if utilities[best] > best_bid_util:
+            return self._bid_sampler.table.bids(indices)[best]
         return best_bid
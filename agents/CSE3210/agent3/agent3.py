@@ -25,6 +25,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.bid_encoder import BidEncoder
+
 """Author:
     Aleksander Buszydlik
     Karol Dobiczek
@@ -54,6 +56,16 @@ class Agent3(DefaultParty):
         self._possible_bids = None
         # Index of the current bid in the stored list of bids
         self._last_index = 0
+        # Value positions and own utilities of the possible bids, in the same order as the list
+        self._bid_encoder: BidEncoder = None
+        self._possible_positions = None
+        self._possible_utilities = None
+        # Welfare of the possible bids at the last rerank, in the same order as the list
+        self._possible_welfare = None
+        # Number of bids at the front of the list that are in their final (welfare) order
+        self._ranked_count = 0
+        # Number of bids put in order at once, only the next few are offered before the next rerank
+        self._rank_chunk = 100
         # Prediction for opponent's weights of issues
         self._opponent_weights = None
         # Prediction for opponent's preferences for issue values
@@ -271,6 +283,8 @@ class Agent3(DefaultParty):
 
         # Choose the next bid from our list of available bids
         num_bids = len(self._possible_bids)
+        if self._ranked_count <= self._last_index < num_bids:
+            self._rank_next_bids()
         bid = self._possible_bids[max(0, min(self._last_index, num_bids - 1))][0]
 
         if self._small_concessions_index == 1 \
@@ -387,6 +401,7 @@ class Agent3(DefaultParty):
             # Sort by utility in descending order
             possible_bids.sort(key=lambda x: x[1], reverse=True)
             self._possible_bids = possible_bids
+            self._index_possible_bids()
             return
 
         # On large domains we need to limit the number of bids taken into consideration
@@ -413,11 +428,78 @@ class Agent3(DefaultParty):
             # Sort by utility in descending order
             possible_bids.sort(key=lambda x: x[1], reverse=True)
             self._possible_bids = possible_bids
+            self._index_possible_bids()
+
+    def _index_possible_bids(self):
+        """Stores the value positions and utilities of the possible bids as arrays,
+        so that the welfare of all of them can be computed at once.
+        """
+        self._bid_encoder = BidEncoder(self._profile.getProfile().getDomain())
+        self._possible_positions = np.array(
+            [self._bid_encoder.index(x[0]) for x in self._possible_bids], dtype=np.int64
+        ).reshape(len(self._possible_bids), len(self._bid_encoder.issues))
+        self._possible_utilities = np.array([float(x[1]) for x in self._possible_bids])
+        self._possible_welfare = None
+        # The list is completely sorted on utility
+        self._ranked_count = len(self._possible_bids)
 
     def _rerank_bids(self):
-        """Sort the list of all acceptable bids based on the current estimate of their welfare
+        """Sort the list of all acceptable bids based on the current estimate of their welfare.
+        Only the first chunk is put in order here, the rest follows in _rank_next_bids
+        when the offered bids reach it.
         """
-        self._possible_bids.sort(key=lambda x: self._calculate_welfare(x[0]), reverse=True)
+        self._possible_welfare = self._calculate_welfares()
+        self._ranked_count = 0
+        self._rank_next_bids()
+
+    def _rank_next_bids(self):
+        """Moves the next chunk of bids by descending welfare to the front of the unranked part
+        of the list. Bids with equal welfare keep their previous order, so the ranked part is the
+        same as with a stable sort of the whole list.
+        """
+        start = self._ranked_count
+        welfare = self._possible_welfare[start:]
+        k = min(self._rank_chunk, len(welfare))
+        if k == 0:
+            return
+
+        if k < len(welfare):
+            # Welfare of the k-th best bid: take everything better and the first ones that are equal
+            threshold = -np.partition(-welfare, k - 1)[k - 1]
+            better = np.flatnonzero(welfare > threshold)
+            equal = np.flatnonzero(welfare == threshold)[:k - len(better)]
+            chosen = np.concatenate([better, equal])
+        else:
+            chosen = np.arange(len(welfare))
+        chosen = chosen[np.lexsort((chosen, -welfare[chosen]))]
+        rest = np.setdiff1d(np.arange(len(welfare)), chosen, assume_unique=True)
+        order = np.concatenate([chosen, rest]) + start
+
+        self._possible_bids[start:] = [self._possible_bids[i] for i in order]
+        self._possible_positions[start:] = self._possible_positions[order]
+        self._possible_utilities[start:] = self._possible_utilities[order]
+        self._possible_welfare[start:] = self._possible_welfare[order]
+        self._ranked_count = start + k
+
+    def _calculate_welfares(self, method="weighted_sum") -> np.ndarray:
+        """Vectorized _calculate_welfare for all possible bids, computed with floats.
+
+        Returns:
+            np.ndarray: Prediction of the welfare of every bid in the list of possible bids
+        """
+        opponent_utilities = np.zeros(len(self._possible_bids))
+        for i, issue in enumerate(self._bid_encoder.issues):
+            value_weights = np.array(
+                [self._opponent_value_weights[issue][value] for value in self._bid_encoder.values[i]], dtype=float
+            )
+            opponent_utilities += self._opponent_weights[issue] * value_weights[self._possible_positions[:, i]]
+
+        if method == "weighted_sum":
+            return self._selfishness_coefficient * self._possible_utilities \
+                   + (1 - self._selfishness_coefficient) * opponent_utilities
+
+        else:
+            return np.minimum(self._possible_utilities, opponent_utilities)
 
     def _calculate_welfare(self, bid, method="weighted_sum") -> Decimal:
         """Calculate welfare which is understood as the sum of own and opponent's utilities.
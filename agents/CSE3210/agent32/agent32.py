@@ -1,5 +1,6 @@
 import logging
 import time
+from heapq import heapify, heappush
 from random import randint
 from typing import cast
 import numpy as np
@@ -37,6 +38,7 @@ class Agent32(DefaultParty):
         self.getReporter().log(logging.INFO, "party is initialized")
         self._profile = None
         self._last_received_bid: Bid = None
+        # Heap of (-utility, turn, bid) of all received bids, the best (and earliest) bid is always in front
         self.previousReceivedBids = []
         self.previousReceivedUtils = []
         self.hasGoodEnemy = True
@@ -132,8 +134,9 @@ class Agent32(DefaultParty):
         else:
             # if not, find a bid to propose as counter offer
             if self._last_received_bid is not None:
-                self.previousReceivedBids.append([profile.getUtility(self._last_received_bid), self._last_received_bid])
-                self.previousReceivedUtils.append(profile.getUtility(self._last_received_bid))
+                utility = profile.getUtility(self._last_received_bid)
+                heappush(self.previousReceivedBids, (-utility, len(self.previousReceivedUtils), self._last_received_bid))
+                self.previousReceivedUtils.append(utility)
             bid = self._findBid()
             action = Offer(self._me, bid)
         # send the action
@@ -155,10 +158,6 @@ class Agent32(DefaultParty):
         # Creates an linear conceiding line ending at 0.65 user utility at the end.
         return profile.getUtility(bid) > max (0.99 -  0.35 * progress, 0.65)
     
-    # Used to sort the list of bids
-    def takeUtility(elem, elem2):
-        return elem2[0]
-    
     def _findBid(self) -> Bid:
         # compose a list of all possible bids
         domain = self._profile.getProfile().getDomain()
@@ -168,37 +167,32 @@ class Agent32(DefaultParty):
         self.validBidOptions = []
         self.allBidOptions = []
 
-
-        self.previousReceivedBids.sort(key= self.takeUtility, reverse=True)
-        
         # After 45% of the bids happend it will check if the enemy is conceiding.
         if progress > 0.45:
             self.hasGoodEnemy = True if self.enemyConceiding() else False
         # take 1000 attempts at finding a random bid that is acceptable to us
-        for _ in range(1000):
+        for attempt in range(1000):
             bid = all_bids.get(randint(0, all_bids.size() - 1))
-            # Save all bid options generated in the format [[utility_1,bid_1], [utility_2,bid_2] , ... [utility_n,bid_n]]
-            # This format is used to later sort on these values
-            self.allBidOptions.append([profile.getUtility(bid), bid])
+            utility = profile.getUtility(bid)
+            # Save all bid options generated in the format (-utility, attempt, bid)
+            # This format is used to later keep the best option in front
+            self.allBidOptions.append((-utility, attempt, bid))
             if self._isGood(bid):
-                # Save all valid options in the before mentioned format. note that the bids are not sorted!
-                self.validBidOptions.append([profile.getUtility(bid), bid])
-        try: 
-            # Sort all bid options so that some checks on the best util can be performed
-            self.allBidOptions.sort(key= self.takeUtility, reverse=True)   
-        except:
-            print("\n")
-        
+                # Save all valid options in the format [utility, bid]. note that the bids are not sorted!
+                self.validBidOptions.append([utility, bid])
+        # Heapify all bid options so that some checks on the best util can be performed
+        heapify(self.allBidOptions)
+
         nextBid = None
         # Sends the best bid it received back to the other agent if it is the last bid
         if(progress >= 0.99 and len(self.previousReceivedBids) > 0):
-            nextBid = self.previousReceivedBids[0]
+            nextBid = self.previousReceivedBids[0][2]
         # checks if a previous received bit is better than the current selected option. If so send back that bid
-        elif(len(self.previousReceivedBids) > 0 and len(self.validBidOptions) > 0 and self.previousReceivedBids[0][0] > self.validBidOptions[0][0]):
-            nextBid = self.previousReceivedBids[0]
+        elif(len(self.previousReceivedBids) > 0 and len(self.validBidOptions) > 0 and -self.previousReceivedBids[0][0] > self.validBidOptions[0][0]):
+            nextBid = self.previousReceivedBids[0][2]
         else:
         # Send back a random valid bid if there is one, otherwise send the best bid for our selves. 
         # (the first bid in the validBidOptions list is already random since it isnt sorted)
-            nextBid = self.validBidOptions[0] if len(self.validBidOptions) > 0  else self.allBidOptions[0]
+            nextBid = self.validBidOptions[0][1] if len(self.validBidOptions) > 0  else self.allBidOptions[0][2]
         # return the bid
-        return nextBid[1]
\ No newline at end of file
+        return nextBid
\ No newline at end of file
@@ -1,12 +1,10 @@
 import decimal
 import time
-from random import randint
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -22,6 +20,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.bid_sampler import BidSampler
+
 reservation_progress = 0.995
 search_numb = 2500
 
@@ -37,6 +37,7 @@ class Agent41(DefaultParty):
         self._profile = None
         self._last_received_bid: Bid = None
         self._best_past_bid: Bid = None
+        self._bid_sampler: BidSampler = None
         self.opponentModel = FrequencyOpponentModel.create()
 
 
@@ -85,6 +86,7 @@ class Agent41(DefaultParty):
 
             domain = self._profile.getProfile().getDomain()
             self.opponentModel = self.opponentModel.With(newDomain=domain, newResBid=0)
+            self._bid_sampler = BidSampler(self._profile.getProfile())
 
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
@@ -192,36 +194,28 @@ class Agent41(DefaultParty):
         """
         Find the most suitable bid to offer given the current state of negotiations.
         """
-        domain = self._profile.getProfile().getDomain()
         profile = self._profile.getProfile()
 
         # verify if the reservation bid should be used
         if self._verify_reservation_val():
             return self._best_past_bid
 
-        # store the best bid found so far
-        best_bid: Bid = self._best_past_bid
-        # store the difference between the utility of the best bid
-        # and the upper threshold of the range
-        best_dist = decimal.Decimal(1.0)
-
-        all_bids = AllBidsList(domain)
+        # only bids in the utility range, and not worse than the best past bid, can be verified,
+        # so the random bids are drawn from that band. The band is slightly widened because the
+        # sampler compares float utilities, _verify_bid checks the exact bounds.
+        lower_util = self.utility_range[0]
+        if self._best_past_bid is not None:
+            lower_util = max(lower_util, profile.getUtility(self._best_past_bid))
+        candidates = self._bid_sampler.sample(search_numb, lower=float(lower_util) - 1e-9,
+                                              upper=float(self.utility_range[1]) + 1e-9)
         # search through a number of random bids to find a suitable bid
-        for _ in range(search_numb):
-            # get the random bid and the utility of it
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            our_util = profile.getUtility(bid)
+        for bid in candidates:
             # verify if the bid is suitable to be offered to the opponent
             if self._verify_bid(bid):
-                best_bid = bid
-                break
-            # If the best bid was not found, check if the current bid is closer to idea value
-            curr_dist = abs(our_util - self.utility_range[1])
-            if curr_dist < best_dist:
-                best_bid = bid
-                best_dist = curr_dist
-
-        return best_bid
+                return bid
+
+        # If no suitable bid was found, offer the bid closest to the ideal value
+        return self._bid_sampler.nearest(self.utility_range[1])
 
     def _update_range(self):
         """
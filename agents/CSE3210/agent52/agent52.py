@@ -1,14 +1,12 @@
 import logging
 import time
 from typing import cast
-from operator import itemgetter
 import numpy as np
 from decimal import Decimal
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -24,6 +22,9 @@ from geniusweb.progress.ProgressRounds import ProgressRounds
 from .FreqModelWeighted import FreqModelWeighted
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.descending_bids import DescendingBidList
+from agents.utils.linear_additive import utility_range
+
 """
 BeanBot agent
 """
@@ -66,16 +67,15 @@ class Agent52(DefaultParty):
             self._opp_model.__class__ = FreqModelWeighted
 
 
-            # Generate sorted (decr.) list of all possible bids with their corresponding utility values
-            # Create reservation value after
+            # Sorted (decr.) list of all possible bids with their corresponding utility values,
+            # generated best-first as far as the bidding strategy reads it
             profile = self._profile.getProfile()
-            allBids = AllBidsList(self._profile.getProfile().getDomain())
-            self._bid_utility_tuple = [(bid, profile.getUtility(bid)) for bid in allBids]
-            self._bid_utility_tuple.sort(key=itemgetter(1), reverse=True)
+            self._sorted_bids = DescendingBidList(profile)
 
             # set reservation value to maximum of (0.4, worst bid utility in domain)
             alpha = 0.4
-            self._rsv_val = alpha if alpha > self._bid_utility_tuple[-1][1] else self._bid_utility_tuple[-1][1]
+            min_util = utility_range(profile)[0]
+            self._rsv_val = alpha if alpha > min_util else min_util
 
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
@@ -198,7 +198,7 @@ class Agent52(DefaultParty):
     def _findBid(self) -> Bid:
         # e value determines concession rate by influencing the shape of the target utility curve
         e = 0.3
-        max_util = self._bid_utility_tuple[0][1]
+        max_util = self._sorted_bids.utility(0)
         target_util = self._getUtilityGoal(self._progress.get(time.time() * 1000), e, Decimal(self._rsv_val), max_util)
         # Allow for some additional (10% of target utility) randomness in the possible bids to send to opponent
         # in the first half of the negotiation. Otherwise, will send mostly the same bid constantly at first.
@@ -208,11 +208,12 @@ class Agent52(DefaultParty):
         candidates = []
         opp_utilities = []
         # Find all bids above target utility and store along with the associated opponent utilities of the bids
-        for items in self._bid_utility_tuple:
-            if items[1] < target_util:
+        for i in range(len(self._sorted_bids)):
+            if self._sorted_bids.utility(i) < target_util:
                 break
-            candidates.append(items[0])
-            opp_utilities.append(float(self._opp_model.getUtility(items[0])))
+            bid = self._sorted_bids[i]
+            candidates.append(bid)
+            opp_utilities.append(float(self._opp_model.getUtility(bid)))
 
         # apply roulette wheel selection to the bids to choose one using exponential fitness function
         return self._roulette_selection(candidates, opp_utilities, self._fitness_exp)
@@ -1,18 +1,19 @@
-from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
-from geniusweb.opponentmodel.OpponentModel import OpponentModel
 from decimal import Decimal
-from geniusweb.issuevalue.Domain import Domain
-from geniusweb.issuevalue.Bid import Bid
 from typing import Dict, Optional
-from geniusweb.issuevalue.Value import Value
+
 from geniusweb.actions.Action import Action
-from geniusweb.progress.Progress import Progress
 from geniusweb.actions.Offer import Offer
-from geniusweb.references.Parameters import Parameters
-from geniusweb.utils import val, HASH, toStr
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+from geniusweb.progress.Progress import Progress
+from geniusweb.utils import val
 
+from agents.utils import frequency_opponent_model
+from agents.utils.frequency_opponent_model import FrequencyHistory
 
-class FrequencyOpponentModel(UtilitySpace, OpponentModel):
+
+class FrequencyOpponentModel(frequency_opponent_model.FrequencyOpponentModel):
     '''
     implements an {@link OpponentModel} by counting frequencies of bids placed by
     the opponent.
@@ -22,31 +23,28 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
     (as you might expect as {@link NumberValueSetUtilities} is only affected by
     the endpoints).
     <p>
+    The frequency bookkeeping (shared counts and cached fractions) is inherited,
+    this class adds the group55 issue weights.
+    <p>
     immutable.
     '''
 
-    _DECIMALS = 4  # accuracy of our computations.
-
     def __init__(self, domain: Optional[Domain],
-                 freqs: Dict[str, Dict[Value, int]],  total: int,
-                 resBid: Optional[Bid]):
+                 freqs: Optional[Dict[str, Dict[Value, int]]], total: int,
+                 resBid: Optional[Bid], history: FrequencyHistory = None):
         '''
         internal constructor. DO NOT USE, see create. Assumes the freqs keyset is
         equal to the available issues.
 
-        @param domain the domain. Should not be None
-        @param freqs  the observed frequencies for all issue values. This map is
-                      assumed to be a fresh private-access only copy.
-        @param total  the total number of bids contained in the freqs map. This
-                      must be equal to the sum of the Integer values in the
-                      {@link #bidFrequencies} for each issue (this is not
-                      checked).
-        @param resBid the reservation bid. Can be null
+        @param domain  the domain. Should not be None
+        @param freqs   the observed frequencies for all issue values. Ignored
+                       if a history is given.
+        @param total   the total number of bids contained in the freqs map.
+        @param resBid  the reservation bid. Can be null
+        @param history the shared counts to read at version total, or None to
+                       start a new history from freqs
         '''
-        self._domain = domain
-        self._bidFrequencies = freqs
-        self._totalBids = total
-        self._resBid = resBid
+        super().__init__(domain, freqs, total, resBid, history)
 
         """
         These variables are dictionaries with all issues of the domain as their keys. '_BidsChangedFrequency' and
@@ -54,25 +52,11 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
         estimated weight of any issue. 
         """
         self._BidsChangedFrequency = {
-            key: 0 for key in self._bidFrequencies.keys()}
+            key: 0 for key in self._issues}
         self._previousIssueValue = {
-            key: None for key in self._bidFrequencies.keys()}
+            key: None for key in self._issues}
         self._issueWeights = {key: Decimal(
-            1/len(self._bidFrequencies)) for key in self._bidFrequencies.keys()}
-
-    @staticmethod
-    def create() -> "FrequencyOpponentModel":
-        return FrequencyOpponentModel(None, {}, 0, None)
-
-    # Override
-    def With(self, newDomain: Domain,  newResBid: Optional[Bid]) -> "FrequencyOpponentModel":
-        if newDomain == None:
-            raise ValueError("domain is not initialized")
-        # FIXME merge already available frequencies?
-        return FrequencyOpponentModel(newDomain,
-                                      {iss: {}
-                                          for iss in newDomain.getIssues()},
-                                      0, newResBid)
+            1/len(self._issues)) for key in self._issues}
 
     """
    The original implementation provided by Geniusweb calculates the utility for a bid with equal weights for each issue:
@@ -93,16 +77,6 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
                         self._getFraction(issue, val(bid.getValue(issue))))
         return round(sum, FrequencyOpponentModel._DECIMALS)
 
-    # Override
-    def getName(self) -> str:
-        if self._domain == None:
-            raise ValueError("domain is not initialized")
-        return "FreqOppModel" + str(hash(self)) + "For" + str(self._domain)
-
-    # Override
-    def getDomain(self) -> Domain:
-        return val(self._domain)
-
     """
     Since this method updates the model with every offer, this is also where we update our
     weights-estimation-variables. 
@@ -117,10 +91,7 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
             return self
 
         bid: Bid = action.getBid()
-        newFreqs: Dict[str, Dict[Value, int]
-                       ] = self.cloneMap(self._bidFrequencies)
         for issue in self._domain.getIssues():  # type:ignore
-            freqs: Dict[Value, int] = newFreqs[issue]
             value = bid.getValue(issue)
             if value != None:
 
@@ -144,11 +115,6 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
                 End of Group55 contribution.
                 """
 
-                oldfreq = 0
-                if value in freqs:
-                    oldfreq = freqs[value]
-                freqs[value] = oldfreq + 1  # type:ignore
-
         """
         Added Group55:
         Now that all issues have been processed. We loop through them again to calculate their weights. 
@@ -171,68 +137,5 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
         End of Group55 contribution
         """
 
-        return FrequencyOpponentModel(self._domain, newFreqs,
-                                      self._totalBids+1, self._resBid)
-
-    def getCounts(self, issue: str) -> Dict[Value, int]:
-        '''
-        @param issue the issue to get frequency info for
-        @return a map containing a map of values and the number of times that
-                value was used in previous bids. Values that are possible but not
-                in the map have frequency 0.
-        '''
-        if self._domain == None:
-            raise ValueError("domain is not initialized")
-        if not issue in self._bidFrequencies:
-            return {}
-        return dict(self._bidFrequencies.get(issue))  # type:ignore
-
-    # Override
-    def WithParameters(self, parameters: Parameters) -> OpponentModel:
-        return self  # ignore parameters
-
-    def _getFraction(self, issue: str, value: Value) -> Decimal:
-        '''
-        @param issue the issue to check
-        @param value the value to check
-        @return the fraction of the total cases that bids contained given value
-                for the issue.
-        '''
-        if self._totalBids == 0:
-            return Decimal(1)
-        if not (issue in self._bidFrequencies and value in self._bidFrequencies[issue]):
-            return Decimal(0)
-        freq: int = self._bidFrequencies[issue][value]
-        # type:ignore
-        return round(Decimal(freq) / self._totalBids, FrequencyOpponentModel._DECIMALS)
-
-    @staticmethod
-    def cloneMap(freqs: Dict[str, Dict[Value, int]]) -> Dict[str, Dict[Value, int]]:
-        '''
-        @param freqs
-        @return deep copy of freqs map.
-        '''
-        map: Dict[str, Dict[Value, int]] = {}
-        for issue in freqs:
-            map[issue] = dict(freqs[issue])
-        return map
-
-    # Override
-    def getReservationBid(self) -> Optional[Bid]:
-        return self._resBid
-
-    def __eq__(self, other):
-        return isinstance(other, self.__class__) and \
-            self._domain == other._domain and \
-            self._bidFrequencies == other._bidFrequencies and \
-            self._totalBids == other._totalBids and \
-            self._resBid == other._resBid
-
-    def __hash__(self):
-        return HASH((self._domain, self._bidFrequencies, self._totalBids, self._resBid))
-    # Override
-
-    # Override
-    def __repr__(self) -> str:
-        return "FrequencyOpponentModel[" + str(self._totalBids) + "," + \
-               toStr(self._bidFrequencies) + "]"
+        # the value counts themselves are recorded by the shared history
+        return super().WithAction(action, progress)
@@ -6,7 +6,6 @@ from math import log10, floor
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from geniusweb.bidspace.Interval import Interval
@@ -24,6 +23,7 @@ from tudelft_utilities_logging.Reporter import Reporter
 import heapq
 from decimal import *
 from .Group55OpponentModel import FrequencyOpponentModel
+from agents.utils.bid_sampler import BidSampler
 
 
 class Agent55(DefaultParty):
@@ -35,6 +35,7 @@ class Agent55(DefaultParty):
         super().__init__(reporter)
         self._utilspace: LinearAdditive = None
         self._bidutils = None
+        self._bid_sampler: BidSampler = None
         self.getReporter().log(logging.INFO, "party is initialized")
         self._profile = None
         self._lastReceivedBid: Bid = None
@@ -390,23 +391,28 @@ class Agent55(DefaultParty):
         if not newutilspace == self._utilspace:
             self._utilspace = newutilspace
             self._bidutils = BidsWithUtility.create(self._utilspace)
+            self._bid_sampler = BidSampler(self._utilspace)
         return self._utilspace
 
     def _generateRandomBid(self) -> tuple[Bid, Decimal]:
-        domain = self._profile.getProfile().getDomain()
-        all_bids = AllBidsList(domain)
         bid = None
 
+        # Only draw from the bids that can be good. Late in the negotiation every bid is good,
+        # before that a good bid has at least the lowest of the two acceptable utilities.
+        # The band is slightly widened because the sampler compares float utilities.
+        lowerUtility = float("-inf")
+        if self._progress.get(time.time() * 1000) < self.timePassedAccept:
+            lowerUtility = float(min(Decimal(self.baselineAcceptableUtility), self._getAcceptableUtility())) - 1e-9
+
         # Try to generate a good random bid
-        for _ in range(self.randomBidDiscoveryAttemptsPerTurn):
-            candidate = all_bids.get(randint(0, all_bids.size() - 1))
+        for candidate in self._bid_sampler.sample(self.randomBidDiscoveryAttemptsPerTurn, lower=lowerUtility):
             if self._isGood(candidate):
                 bid = candidate
                 break
 
         # If no good ones found within the allocated attempt count, pick at random
         if bid is None:
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
+            bid = self._bid_sampler.sample(1)[0]
 
         nash = self._getNashProduct(bid)
 
@@ -2,7 +2,9 @@ from decimal import Decimal
 from random import randint
 from typing import cast
 
-from geniusweb.bidspace.AllBidsList import AllBidsList
+import numpy as np
+
+from agents.utils.utility_table import UtilityTable
 
 from ..Constants import Constants
 
@@ -15,32 +17,26 @@ class TradeOff:
         self._tolerance = Constants.iso_bids_tolerance
         self._domain = domain
         self._issues = domain.getIssues()
-        self._sorted_bids = self._sort_bids(AllBidsList(self._domain))
+        self._utility_table = UtilityTable(self._profile)
+        self._sort_bids()
 
-    # sort bids on Utility descending
-    def _sort_bids(self, all_bids):
-        bids = []
-        for b in all_bids:
-            bid = {"bid": b, "utility": self._profile.getUtility(b)}
-            bids.append(bid)
-        return sorted(bids, key=lambda d: d['utility'], reverse=True)
+    # sort bids on Utility descending, as bid indices with a parallel array of negated utilities
+    # (ascending, so that utility windows can be found with a binary search)
+    def _sort_bids(self):
+        self._sorted_bids = self._utility_table.bids(self._utility_table.descending())
+        self._sorted_neg_utilities = -self._utility_table.all_utilities()[self._sorted_bids.indices]
 
     # return set of iso curve bids
     def _iso_bids(self, n=5):
-        bids = []
-        i = 0
-        for bid in self._sorted_bids:
-            if self._offer + self._tolerance > bid["utility"] > self._offer - self._tolerance:
-                bids.append(bid["bid"])
-                i += 1
-            if i == n:
-                break
-        return bids
+        # bids with offer - tolerance < utility < offer + tolerance, best first
+        offer = float(self._offer)
+        start = np.searchsorted(self._sorted_neg_utilities, -(offer + self._tolerance), side="right")
+        end = np.searchsorted(self._sorted_neg_utilities, -(offer - self._tolerance), side="left")
+        return list(self._sorted_bids[start:min(start + n, end)])
 
     # return a random bid
     def _get_random_bid(self):
-        all_bids = AllBidsList(self._domain)
-        return all_bids.get(randint(0, all_bids.size() - 1))
+        return self._sorted_bids[randint(0, len(self._sorted_bids) - 1)]
 
     # decrease our utility if we do not make any progress
     def _decrease_offer(self, received_bids, sent_bids, boulware):
@@ -1,9 +1,11 @@
 import copy
 import logging
 import time
-from random import randint, choice
+from random import choice
 from typing import cast, Dict
 
+import numpy as np
+
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
@@ -25,6 +27,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.utility_table import UtilityTable
+
 
 class Agent61(DefaultParty):
     """
@@ -38,6 +42,7 @@ class Agent61(DefaultParty):
         self._received_bids = list()
         self._sent_bids = list()
         self._best_bid = None
+        self._utility_table: UtilityTable = None
         self._last_received_bid: Bid = None
         self._last_sent_bid: Bid = None
         self._opponent_model: FrequencyOpponentModel = None
@@ -133,6 +138,7 @@ class Agent61(DefaultParty):
             bidVals[issue] = max(utilvals.getUtilities(), key=utilvals.getUtilities().get)
 
         self._best_bid = Bid(bidVals)
+        self._utility_table = UtilityTable(own_prof)
 
     # execute a turn
     def _myTurn(self):
@@ -190,24 +196,34 @@ class Agent61(DefaultParty):
         self._sent_bids.append(copy.deepcopy(selected_bid))
         return selected_bid
     
-    # Creates a bid by mutating the agent's ideal bid to fit closer
+    # Creates bids by mutating the agent's bid to fit closer
     # to what the opponent model believes is beneficial to the other
-    # party. The more time has passed, the more the ideal bid is mutated
-    def _mutateBid(self, bid: Bid) -> Bid:
+    # party. The more time has passed, the more the bid is mutated.
+    # All mutations are done at once on value positions, returns the
+    # mixed radix indices of the mutated bids and their (float) utilities
+    def _mutateBids(self, bid: Bid, count: int):
 
         own_prof = self._profile.getProfile()
         bw = own_prof.getWeights()
+        table = self._utility_table
+        encoder = table.encoder
 
         sorted_weights = sorted(bw, key=bw.get)
-        issues_vals = copy.deepcopy(bid.getIssueValues())
         current_index = int((len(sorted_weights) - 1.0) * self._progress.get(time.time() * 1000))
+        # issues in the order they are mutated
+        mutated = [encoder.issues.index(issue) for issue in reversed(sorted_weights[:current_index + 1])]
 
-        while current_index >= 0 and own_prof.getUtility(Bid(issues_vals)) > self._reservation_value:
-            sel_issue_vals = own_prof.getDomain().getIssuesValues()[sorted_weights[current_index]]
-            issues_vals[sorted_weights[current_index]] = sel_issue_vals.get(randint(0, sel_issue_vals.size() - 1))
-            current_index = current_index - 1
+        positions = np.tile(np.array(encoder.index(bid), dtype=np.int64), (count, 1))
+        utilities = table.utilities(positions)
 
-        return Bid(issues_vals)
+        # a mutation only happens while the bid is still above the reservation value
+        for i in mutated:
+            active = utilities > float(self._reservation_value)
+            new_values = np.random.randint(0, encoder.num_values[i], size=count)
+            utilities[active] += table.weighted[i][new_values[active]] - table.weighted[i][positions[active, i]]
+            positions[active, i] = new_values[active]
+
+        return positions @ np.array(encoder.strides, dtype=np.int64), utilities
    
     # Finds an intelligent counter bid, relying on opponent modelling and the
     # mutateBid function to find a bid that maximizes the Nash product, tries
@@ -219,13 +235,19 @@ class Agent61(DefaultParty):
         selected_bid = copy.deepcopy(self._last_sent_bid)
         max_nash_prod = (own_prof.getUtility(selected_bid) * self._opponent_model.getUtility(selected_bid))
 
-        for _ in range(50):
-            newbid = self._mutateBid(copy.deepcopy(self._best_bid))
-            new_nash_prod = (own_prof.getUtility(newbid) * self._opponent_model.getUtility(newbid))
+        flat_indices, utilities = self._mutateBids(self._best_bid, 50)
+        # bids at or below the reservation value are never selected, skip them before
+        # evaluating the opponent model. The bound is widened a bit for float rounding.
+        candidates = flat_indices[utilities > float(self._reservation_value) - 1e-9]
+
+        for newbid in self._utility_table.bids(candidates):
+            own_util = own_prof.getUtility(newbid)
+            opp_util = self._opponent_model.getUtility(newbid)
+            new_nash_prod = (own_util * opp_util)
 
-            diff = (self._opponent_model.getUtility(newbid) - own_prof.getUtility(newbid))
+            diff = (opp_util - own_util)
 
-            if new_nash_prod > max_nash_prod and diff < 0.1 and own_prof.getUtility(newbid) > self._reservation_value:
+            if new_nash_prod > max_nash_prod and diff < 0.1 and own_util > self._reservation_value:
                 # print("OLD: " + str(max_nash_prod) + ", NEW: " + str(new_nash_prod))
 
                 max_nash_prod = new_nash_prod
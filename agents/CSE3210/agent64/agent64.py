@@ -7,7 +7,6 @@ import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -21,6 +20,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (ProfileConnect
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.utility_table import UtilityTable
+
 
 class Agent64(DefaultParty):
     """
@@ -49,6 +50,18 @@ class Agent64(DefaultParty):
         self.niceness = 0.00125
         self._concesssion_treshold = 1.2
         self.accept_offer_now_time = None
+        # Bid space sorted on ascending utility, built once per session
+        self._utility_table: UtilityTable = None
+        self._sorted_indices: np.ndarray = None
+        self._sorted_utilities: np.ndarray = None
+        # Per issue how often the opponent offered each value, mirroring the frequency model
+        self._value_counts: list = None
+        self._received_count = 0
+        # Cached band of the sorted index: its [start, end) range, value positions
+        # and summed value counts, updated with every received bid
+        self._band_range: tuple = None
+        self._band_positions: np.ndarray = None
+        self._band_matches: np.ndarray = None
 
     def notifyChange(self, info: Inform):
         """This is the entry point of all interaction with your agent after is has been initialised.
@@ -215,34 +228,94 @@ class Agent64(DefaultParty):
         return bid
 
     def get_random_bid(self):
-        available_bids = AllBidsList(self._profile.getProfile().getDomain())
-        random_better_bids = [bid for bid in available_bids if
-                              self.cmin <= self._profile.getProfile().getUtility(bid) <= self.cmax]
-        if len(random_better_bids) == 0:
-            random_better_bids = [
-                max(map(lambda bid: (bid, self._profile.getProfile().getUtility(bid)), available_bids),
-                    key=lambda tup: tup[1])[0]]
-            return random_better_bids[0]
-        best_bid_for_opponent = [
-            max(map(
-                lambda bid: (bid, self._opponent_model.getUtility(bid) * self._profile.getProfile().getUtility(bid)),
-                random_better_bids),
-                key=lambda tup: tup[1])[0]]
-        return best_bid_for_opponent[0]
+        """Returns the bid in [cmin, cmax] that maximises opponent utility * own utility,
+        or our best bid if there is no bid in that range."""
+        start, end = self._band(self.cmin, self.cmax)
+        if start == end:
+            return self._bidAt(len(self._sorted_indices) - 1)
+        if self._received_count == 0:
+            # the opponent model rates every bid 1, so the best bid for us wins
+            return self._bidAt(end - 1)
+        # The frequency model's utility of a bid is proportional to its summed value counts
+        scores = self._bandMatches(start, end) * self._sorted_utilities[start:end]
+        return self._bidAt(start + int(np.argmax(scores)))
 
     def get_true_random_bid(self):
-        available_bids = AllBidsList(self._profile.getProfile().getDomain())
-        random_better_bids = [bid for bid in available_bids if self._profile.getProfile().getUtility(bid) >= self.cmin]
-        if len(random_better_bids) == 0:
-            random_better_bids = [
-                max(map(lambda bid: (bid, self._profile.getProfile().getUtility(bid)), available_bids),
-                    key=lambda tup: tup[1])[0]]
-        return np.random.choice(random_better_bids)
+        """Returns a uniformly random bid with utility at least cmin,
+        or our best bid if there is no such bid."""
+        start, end = self._band(self.cmin, np.inf)
+        if start == end:
+            return self._bidAt(len(self._sorted_indices) - 1)
+        return self._bidAt(np.random.randint(start, end))
+
+    def _sortBids(self):
+        """Sorts the bid space on ascending utility, once per session."""
+        if self._utility_table is None:
+            self._utility_table = UtilityTable(self._profile.getProfile())
+            utilities = self._utility_table.all_utilities()
+            self._sorted_indices = np.argsort(utilities, kind="stable")
+            self._sorted_utilities = utilities[self._sorted_indices]
+            self._value_counts = [np.zeros(n) for n in self._utility_table.encoder.num_values]
+
+    def _band(self, lower: float, upper: float) -> tuple:
+        """Returns the [start, end) range of the sorted bids with lower <= utility <= upper."""
+        self._sortBids()
+        return (int(np.searchsorted(self._sorted_utilities, lower, side="left")),
+                int(np.searchsorted(self._sorted_utilities, upper, side="right")))
+
+    def _bidAt(self, position: int) -> Bid:
+        return self._utility_table.encoder.decode(int(self._sorted_indices[position]))
+
+    def _bandMatches(self, start: int, end: int) -> np.ndarray:
+        """Returns for the sorted bids in [start, end) the sum over the issues of how often
+        the opponent offered the bid's value. The part of the band that was already cached
+        is reused, only bids that entered the band are looked up."""
+        cached = self._band_range
+        if cached is None or start >= cached[1] or end <= cached[0]:
+            cached = (start, start)
+            self._band_positions = self._positions(start, start)
+            self._band_matches = np.zeros(0)
+        keep = slice(max(start, cached[0]) - cached[0], min(end, cached[1]) - cached[0])
+        positions = [self._band_positions[keep]]
+        matches = [self._band_matches[keep]]
+        if start < cached[0]:
+            positions.insert(0, self._positions(start, cached[0]))
+            matches.insert(0, self._countMatches(positions[0]))
+        if end > cached[1]:
+            positions.append(self._positions(cached[1], end))
+            matches.append(self._countMatches(positions[-1]))
+
+        self._band_range = (start, end)
+        self._band_positions = np.concatenate(positions)
+        self._band_matches = np.concatenate(matches)
+        return self._band_matches
+
+    def _positions(self, start: int, end: int) -> np.ndarray:
+        return self._utility_table.positions(self._sorted_indices[start:end])
+
+    def _countMatches(self, positions: np.ndarray) -> np.ndarray:
+        matches = np.zeros(len(positions))
+        for i, counts in enumerate(self._value_counts):
+            matches += counts[positions[:, i]]
+        return matches
+
+    def _countReceivedBid(self, bid: Bid):
+        """Adds a received bid to the value counts and to the cached band, O(band) without
+        touching the rest of the bid space."""
+        self._sortBids()
+        bid_positions = self._utility_table.encoder.index(bid)
+        for counts, position in zip(self._value_counts, bid_positions):
+            counts[position] += 1
+        self._received_count += 1
+        if self._band_range is not None:
+            self._band_matches += (self._band_positions == np.array(bid_positions)).sum(axis=1)
 
     def _opponentModelling(self):
         if self._opponent_model is None:
             self._createFrequencyOpponentModelling()
         self._opponent_model = self._opponent_model.WithAction(self._last_received_action, self._progress)
+        if isinstance(self._last_received_action, Offer):
+            self._countReceivedBid(self._last_received_action.getBid())
 
     def _createFrequencyOpponentModelling(self):
         domain = self._profile.getProfile().getDomain()
@@ -26,6 +26,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.utils.linear_additive import best_bid
+
 
 
 class Agent67(DefaultParty):
@@ -363,20 +365,8 @@ class Agent67(DefaultParty):
         Returns the best bid
         """
         if(not self.calculated_bid):
-            domain = self._profile.getProfile().getDomain()
-            all_bids = AllBidsList(domain)
-            profile = self._profile.getProfile()
-
-            best_utility = 0.0
-
-            for x in all_bids:
-                curr_utility = profile.getUtility(x)
-                if(best_utility < curr_utility):
-                    bid = x
-                    best_utility = curr_utility
-
             self.calculated_bid = True
-            self.best_bid = bid
+            self.best_bid = best_bid(self._profile.getProfile())
 
             return self.best_bid
         else:
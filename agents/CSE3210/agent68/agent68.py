@@ -18,7 +18,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
     ProfileConnectionFactory,
 )
 from geniusweb.progress.ProgressRounds import ProgressRounds
-from geniusweb.opponentmodel.FrequencyOpponentModel import FrequencyOpponentModel
+from agents.utils.frequency_opponent_model import FrequencyOpponentModel
 from tudelft_utilities_logging.Reporter import Reporter
 
 # from main.bidding.bidding import Bidding
@@ -1,6 +1,6 @@
 from multiprocessing import Value
 
-from geniusweb.opponentmodel.FrequencyOpponentModel import FrequencyOpponentModel
+from agents.utils.frequency_opponent_model import FrequencyOpponentModel
 from geniusweb.profile.Profile import Profile
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
@@ -2,7 +2,8 @@ import logging
 from random import randint
 from time import time
 from typing import cast
-import json
+
+import numpy as np
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
@@ -28,6 +29,9 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.utils.bid_encoder import BidEncoder
+from .utils.concession_window import ConcessionWindow
+from .utils.negotiation_trace import NegotiationTrace
 from .utils.opponent_model import OpponentModel
 
 
@@ -57,14 +61,19 @@ class TemplateAgent(DefaultParty):
         self.lambda_point = 0.9
         # Behavior pattern
         self.beta = 1.5
-        self.opponent_bid_history = []
+        # distinct bids among the last received bids, keyed by their encoder index.
+        # The window size can be set with the "concession_window" parameter
+        self.concession_window = ConcessionWindow(10)
+        self.bid_encoder: BidEncoder = None
         
         self.reservation_value = 0.5
         self.best_received_utility = 0.0
         
-        # logs
-        self.received_bids = []
-        self.sent_bids = []
+        # logs, bounded columnar traces of BidEncoder indices and utilities.
+        # Capacity and retention ("ring" or "sample") can be set with the
+        # "trace_capacity" and "trace_retention" parameters
+        self.received_bids = NegotiationTrace()
+        self.sent_bids = NegotiationTrace()
         self.accepted_bid = None
         self.round_number = 0
 
@@ -88,6 +97,16 @@ class TemplateAgent(DefaultParty):
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
+            window_size = self.parameters.get("concession_window")
+            if window_size is not None:
+                self.concession_window = ConcessionWindow(int(window_size))
+            trace_capacity = self.parameters.get("trace_capacity")
+            trace_retention = self.parameters.get("trace_retention")
+            if trace_capacity is not None or trace_retention is not None:
+                capacity = 4096 if trace_capacity is None else int(trace_capacity)
+                retention = "ring" if trace_retention is None else str(trace_retention)
+                self.received_bids = NegotiationTrace(capacity, retention)
+                self.sent_bids = NegotiationTrace(capacity, retention)
 
             # the profile contains the preferences of the agent over the domain
             profile_connection = ProfileConnectionFactory.create(
@@ -95,6 +114,7 @@ class TemplateAgent(DefaultParty):
             )
             self.profile = profile_connection.getProfile()
             self.domain = self.profile.getDomain()
+            self.bid_encoder = BidEncoder(self.domain)
             profile_connection.close()
 
         # ActionDone informs you of an action (an offer or an accept)
@@ -177,20 +197,13 @@ class TemplateAgent(DefaultParty):
             self.round_number += 1
             
             utility = float(self.profile.getUtility(bid))
-            opponent_entry = {
-                "round": self.round_number,
-                "bid": str(bid),
-                "utility": utility,
-            }
-            self.received_bids.append(opponent_entry)
+            self.received_bids.append(self.round_number, self.bid_encoder.flat_index(bid), utility)
             
             self.best_received_utility = max(self.best_received_utility, utility)
             
             # lambda adaptation
-            self.opponent_bid_history.append(bid)
-            window = self.opponent_bid_history[-10:]  # use the last 10 bids
-            unique_bids = {str(b) for b in window}
-            concession_ratio = len(unique_bids) / len(window) if window else 0
+            self.concession_window.add(self.bid_encoder.flat_index(bid))
+            concession_ratio = self.concession_window.concession_ratio()
             
             # update lambda
             self.lambda_point = max(0.6, min(0.95, 0.9 - 0.3 * concession_ratio))
@@ -219,12 +232,9 @@ class TemplateAgent(DefaultParty):
                 if self.opponent_model else 0
             )
             
-            self.sent_bids.append({
-                "round": self.round_number,
-                "bid": str(bid),
-                "utility": utility,
-                "predicted_opponent_utility": opponent_utility,
-            })
+            self.sent_bids.append(
+                self.round_number, self.bid_encoder.flat_index(bid), utility, opponent_utility
+            )
 
         # send the action
         self.send_action(action)
@@ -235,14 +245,17 @@ class TemplateAgent(DefaultParty):
         Taking too much time might result in your agent being killed, so use it for storage only.
         """
         data = {
-            "received_bids": self.received_bids,
-            "sent_bids": self.sent_bids,
-            "accepted_bid": str(self.accepted_bid) if self.accepted_bid else None,
+            "accepted_bid": self.bid_encoder.flat_index(self.accepted_bid) if self.accepted_bid else -1,
             "lambda_point": self.lambda_point,
             "reservation_value": self.reservation_value,
-            }   
-        with open(f"{self.storage_dir}/data.json", "w") as f:
-            json.dump(data, f, indent=2)
+            "received_total": self.received_bids.total(),
+            "sent_total": self.sent_bids.total(),
+        }
+        for name, trace in (("received", self.received_bids), ("sent", self.sent_bids)):
+            for column, values in trace.columns().items():
+                data[f"{name}_{column}"] = values
+        # uncompressed binary columns, bids are BidEncoder indices of the domain
+        np.savez(f"{self.storage_dir}/data.npz", **data)
 
     ###########################################################################################
     ################################## Example methods below ##################################
@@ -0,0 +1,50 @@
+from collections import deque
+from typing import Deque, Dict, Hashable
+
+
+class ConcessionWindow:
+    """Rolling multiset over the keys of the last received bids.
+
+    It keeps a count per key and the number of distinct keys, so adding a
+    bid and reading the concession ratio are O(1) regardless of the length
+    of the negotiation.
+    """
+
+    def __init__(self, size: int = 10):
+        """
+        Args:
+            size (int, optional): number of most recent bids in the window.
+                Defaults to 10.
+        """
+        if size < 1:
+            raise ValueError("window size must be positive, got " + str(size))
+        self.size = size
+        self._keys: Deque[Hashable] = deque()
+        self._counts: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable):
+        """Adds the key of a received bid, dropping the oldest key when the
+        window is full.
+
+        Args:
+            key (Hashable): interned key of the bid, equal bids must have equal keys
+        """
+        if len(self._keys) == self.size:
+            oldest = self._keys.popleft()
+            count = self._counts[oldest] - 1
+            if count == 0:
+                del self._counts[oldest]
+            else:
+                self._counts[oldest] = count
+        self._keys.append(key)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def concession_ratio(self) -> float:
+        """
+        Returns:
+            float: fraction of distinct bids in the window, 0 if it is empty
+        """
+        return len(self._counts) / len(self._keys) if self._keys else 0
@@ -0,0 +1,112 @@
+from typing import Dict
+
+import numpy as np
+
+RETENTIONS = ("ring", "sample")
+
+
+class NegotiationTrace:
+    """Bounded columnar log of the bids of one side of a negotiation.
+
+    Every entry is a round number, the BidEncoder index of the bid and float32
+    utilities, stored in preallocated numpy columns. Memory does not grow with
+    the number of rounds:
+
+    - "ring" retention keeps the most recent capacity entries.
+    - "sample" retention keeps the whole timeline. When the columns are full,
+      every other entry is dropped and from then on only every stride-th entry
+      is recorded, with the stride doubling on each compaction.
+    """
+
+    def __init__(self, capacity: int = 4096, retention: str = "ring"):
+        """
+        Args:
+            capacity (int, optional): maximum number of entries kept. Defaults to 4096.
+            retention (str, optional): "ring" or "sample", see the class
+                docstring. Defaults to "ring".
+        """
+        if capacity < 2:
+            raise ValueError("trace capacity must be at least 2, got " + str(capacity))
+        if retention not in RETENTIONS:
+            raise ValueError("unknown trace retention " + repr(retention))
+        self.capacity = capacity
+        self.retention = retention
+
+        self._round = np.zeros(capacity, dtype=np.int32)
+        self._bid = np.zeros(capacity, dtype=np.int64)
+        self._utility = np.zeros(capacity, dtype=np.float32)
+        self._opponent_utility = np.zeros(capacity, dtype=np.float32)
+
+        # number of entries kept, and the next slot to write for ring retention
+        self._count = 0
+        self._next = 0
+        # number of entries offered to append, and the sampling stride
+        self._offered = 0
+        self._stride = 1
+
+    def append(self, round_number: int, bid: int, utility: float, opponent_utility: float = np.nan):
+        """Records a bid.
+
+        Args:
+            round_number (int): round in which the bid was made
+            bid (int): BidEncoder index of the bid
+            utility (float): our utility of the bid
+            opponent_utility (float, optional): predicted opponent utility of the
+                bid. Defaults to NaN.
+        """
+        offered = self._offered
+        self._offered += 1
+
+        if self.retention == "ring":
+            slot = self._next
+            self._next = (slot + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+        else:
+            if offered % self._stride != 0:
+                return
+            if self._count == self.capacity:
+                self._compact()
+                if offered % self._stride != 0:
+                    return
+            slot = self._count
+            self._count += 1
+
+        self._round[slot] = round_number
+        self._bid[slot] = bid
+        self._utility[slot] = utility
+        self._opponent_utility[slot] = opponent_utility
+
+    def _compact(self):
+        """Halves the sampled entries and doubles the stride."""
+        kept = (self._count + 1) // 2
+        for column in (self._round, self._bid, self._utility, self._opponent_utility):
+            column[:kept] = column[: self._count : 2]
+        self._count = kept
+        self._stride *= 2
+
+    def __len__(self) -> int:
+        return self._count
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Returns:
+            Dict[str, np.ndarray]: the kept entries in chronological order, as
+                "round", "bid", "utility" and "opponent_utility" columns
+        """
+        if self.retention == "ring" and self._count == self.capacity:
+            order = np.roll(np.arange(self.capacity), -self._next)
+        else:
+            order = slice(0, self._count)
+        return {
+            "round": self._round[order],
+            "bid": self._bid[order],
+            "utility": self._utility[order],
+            "opponent_utility": self._opponent_utility[order],
+        }
+
+    def total(self) -> int:
+        """
+        Returns:
+            int: number of bids appended, including the ones that were not kept
+        """
+        return self._offered
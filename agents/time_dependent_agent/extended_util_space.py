@@ -8,6 +8,8 @@ from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from decimal import Decimal
 from typing import List
 
+from agents.utils.linear_additive import utility_range
+
 
 class ExtendedUtilSpace:
     """
@@ -25,14 +27,12 @@ class ExtendedUtilSpace:
         """
         Computes the fields minutil and maxUtil.
         <p>
-        TODO this is simplistic, very expensive method and may cause us to run
-        out of time on large domains.
+        The extremes of a linear additive space follow from the best and worst
+        value of every issue, see utility_range, so this is O(issues * values).
         <p>
-        Assumes that utilspace and bidutils have been set properly.
+        Assumes that utilspace has been set properly.
         """
-        range = self._bidutils.getRange()
-        self._minUtil = range.getMin()
-        self._maxUtil = range.getMax()
+        self._minUtil, self._maxUtil = utility_range(self._utilspace)
 
         rvbid = self._utilspace.getReservationBid()
         if rvbid != None:
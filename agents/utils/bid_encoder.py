@@ -0,0 +1,183 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+
+
+class BidEncoder:
+    """
+    One-hot (and ordinal) encoding of bids for learning agents.
+
+    The value-to-column maps are built once per domain, so encoding a bid costs
+    a dictionary lookup per issue instead of a linear search through the value
+    set of every issue. Issues are ordered alphabetically and values keep the
+    order of the domain's value sets.
+
+    Bids are also numbered in mixed radix over the value positions (the last
+    issue varies fastest), which allows decoding an index back into a Bid
+    without materialising the bid space.
+    """
+
+    def __init__(self, domain: Domain, bias: bool = False, cache_size: int = 1024):
+        """
+        @param domain the domain whose bids will be encoded
+        @param bias if True, column 0 is a constant 1.0 bias term
+        @param cache_size number of recently decoded Bid objects to keep
+        """
+        self.domain = domain
+        self.bias = bias
+        self.issues: List[str] = sorted(domain.getIssues())
+        self.values: List[List[Value]] = [
+            list(domain.getValues(issue).getValues()) for issue in self.issues
+        ]
+        self.num_values: List[int] = [len(values) for values in self.values]
+
+        # value -> position within its issue, and value -> absolute column
+        self._value_index: List[Dict[Value, int]] = [
+            {value: i for i, value in enumerate(values)} for values in self.values
+        ]
+        start = 1 if bias else 0
+        self.offsets: List[int] = []
+        for n in self.num_values:
+            self.offsets.append(start)
+            start += n
+        self.num_columns = start
+        self._columns: List[Dict[Value, int]] = [
+            {value: offset + i for value, i in index.items()}
+            for offset, index in zip(self.offsets, self._value_index)
+        ]
+
+        self._buffer = np.zeros(self.num_columns)
+
+        # mixed radix strides, the last issue has stride 1
+        self.size = 1
+        self.strides: List[int] = [0] * len(self.issues)
+        for i in reversed(range(len(self.issues))):
+            self.strides[i] = self.size
+            self.size *= self.num_values[i]
+
+        self._decode_cached = lru_cache(maxsize=cache_size)(self._decode)
+
+    def index(self, bid: Bid) -> Tuple[int, ...]:
+        """
+        @return the position of the bid's value within each issue's value set
+        """
+        return tuple(
+            index[bid.getValue(issue)]
+            for issue, index in zip(self.issues, self._value_index)
+        )
+
+    def flat_index(self, bid: Bid) -> int:
+        """
+        @return the mixed radix number of the bid, in [0, size)
+        """
+        return sum(i * stride for i, stride in zip(self.index(bid), self.strides))
+
+    def decode(self, index: Union[int, Tuple[int, ...]]) -> Bid:
+        """
+        Builds the bid for an index, recently used bids are served from an LRU
+        cache.
+
+        @param index either a flat mixed radix number (see flat_index) or a
+            tuple with the value position of every issue (see index)
+        @return the corresponding Bid
+        """
+        if not isinstance(index, tuple):
+            index = self._digits(int(index))
+        return self._decode_cached(tuple(int(i) for i in index))
+
+    def _digits(self, flat_index: int) -> Tuple[int, ...]:
+        if not 0 <= flat_index < self.size:
+            raise IndexError(f"bid index {flat_index} out of range [0, {self.size})")
+        return tuple(
+            (flat_index // stride) % n for stride, n in zip(self.strides, self.num_values)
+        )
+
+    def _decode(self, positions: Tuple[int, ...]) -> Bid:
+        return Bid(
+            {
+                issue: values[i]
+                for issue, values, i in zip(self.issues, self.values, positions)
+            }
+        )
+
+    def positions(self, issue: str) -> Dict[Value, int]:
+        """
+        @return map from every value of the issue to its position in the value set
+        """
+        return dict(self._value_index[self.issues.index(issue)])
+
+    def columns(self, bid: Bid) -> List[int]:
+        """
+        @return the one-hot columns that are set for the bid, one per issue
+        """
+        return [
+            columns[bid.getValue(issue)]
+            for issue, columns in zip(self.issues, self._columns)
+        ]
+
+    def encode(self, bid: Bid, out: np.ndarray = None) -> np.ndarray:
+        """
+        One-hot encodes a single bid.
+
+        @param bid the bid to encode
+        @param out optional array of length num_columns to write into. Pass
+            encoder.buffer to avoid allocating in a hot loop; its content is
+            overwritten on the next call, so copy it if it must be kept.
+        @return the dense encoding
+        """
+        if out is None:
+            out = np.zeros(self.num_columns)
+        else:
+            out.fill(0.0)
+        if self.bias:
+            out[0] = 1.0
+        out[self.columns(bid)] = 1.0
+        return out
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """Reusable scratch array for encode(bid, out=encoder.buffer)."""
+        return self._buffer
+
+    def encode_many(self, bids: Iterable[Bid], sparse: bool = False):
+        """
+        One-hot encodes a batch of bids, one row per bid.
+
+        @param bids the bids to encode
+        @param sparse if True a scipy.sparse csr_matrix is returned instead of
+            a dense numpy array
+        """
+        column_ids = np.array([self.columns(bid) for bid in bids], dtype=np.int64)
+        column_ids = column_ids.reshape(-1, len(self.issues))
+        num_rows = column_ids.shape[0]
+
+        if self.bias:
+            bias_column = np.zeros((num_rows, 1), dtype=np.int64)
+            column_ids = np.hstack([bias_column, column_ids])
+
+        if sparse:
+            from scipy.sparse import csr_matrix
+
+            row_width = column_ids.shape[1]
+            data = np.ones(num_rows * row_width)
+            indptr = np.arange(0, num_rows * row_width + 1, row_width)
+            return csr_matrix(
+                (data, column_ids.ravel(), indptr),
+                shape=(num_rows, self.num_columns),
+            )
+
+        matrix = np.zeros((num_rows, self.num_columns))
+        matrix[np.arange(num_rows)[:, None], column_ids] = 1.0
+        return matrix
+
+    def ordinal_many(self, bids: Iterable[Bid]) -> np.ndarray:
+        """
+        @return integer matrix with the value position of every issue, one row
+            per bid, for models that take label encoded features
+        """
+        matrix = np.array([self.index(bid) for bid in bids], dtype=np.int64)
+        return matrix.reshape(-1, len(self.issues))
@@ -0,0 +1,116 @@
+from math import inf
+from typing import Tuple
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.utils.bid_encoder import BidEncoder
+from agents.utils.utility_table import BidSequence, UtilityTable
+
+
+class BidSampler:
+    """
+    Uniform random bids from a utility band of a LinearAdditive profile.
+
+    Drawing random bids from AllBidsList and rejecting them on utility wastes
+    most draws when the requested band is a sparse, high utility region, and
+    evaluates a Decimal utility for each of them. The sampler sorts the whole
+    bid space on utility once, so a band [lower, upper] is a range of the
+    sorted mixed radix indices and drawing from it is uniform without any
+    rejections.
+
+    Bounds are compared with float utilities. Callers that need the exact
+    Decimal boundary should widen the band slightly and check the drawn bids.
+    """
+
+    def __init__(self, profile: LinearAdditive, encoder: BidEncoder = None):
+        """
+        @param profile the profile to sample bids for
+        @param encoder encoder of the profile's domain, a new one is created if
+            omitted
+        """
+        self.table = UtilityTable(profile, encoder)
+        self.encoder = self.table.encoder
+        utilities = self.table.all_utilities()
+        self._sorted_indices = np.argsort(utilities, kind="stable")
+        self._sorted_utilities = utilities[self._sorted_indices]
+
+    def band(self, lower: float = -inf, upper: float = inf) -> Tuple[int, int]:
+        """
+        @return the [start, end) range of the utility sorted bids with
+            lower <= utility <= upper
+        """
+        return (
+            int(np.searchsorted(self._sorted_utilities, float(lower), side="left")),
+            int(np.searchsorted(self._sorted_utilities, float(upper), side="right")),
+        )
+
+    def count(self, lower: float = -inf, upper: float = inf) -> int:
+        """
+        @return the number of bids with lower <= utility <= upper
+        """
+        start, end = self.band(lower, upper)
+        return max(0, end - start)
+
+    def sample_indices(
+        self, n: int, lower: float = -inf, upper: float = inf
+    ) -> np.ndarray:
+        """
+        @param n the number of draws
+        @return mixed radix indices of n bids drawn uniformly, with
+            replacement, from the bids with lower <= utility <= upper. Empty if
+            there are no such bids.
+        """
+        start, end = self.band(lower, upper)
+        if end <= start:
+            return np.zeros(0, dtype=np.int64)
+        return self._sorted_indices[np.random.randint(start, end, size=n)]
+
+    def sample(self, n: int, lower: float = -inf, upper: float = inf) -> BidSequence:
+        """
+        @return a lazy sequence of n bids drawn as in sample_indices
+        """
+        return self.table.bids(self.sample_indices(n, lower, upper))
+
+    def ascending(self) -> BidSequence:
+        """
+        @return a lazy sequence of all bids, sorted on ascending utility
+        """
+        return self.table.bids(self._sorted_indices)
+
+    def ascending_utilities(self) -> np.ndarray:
+        """
+        @return the float utilities of the bids of ascending(), in the same order
+        """
+        return self._sorted_utilities
+
+    def utilities(self, flat_indices: np.ndarray) -> np.ndarray:
+        """
+        @return the float utilities of the bids with the given indices
+        """
+        return self.table.all_utilities()[np.asarray(flat_indices, dtype=np.int64)]
+
+    def encode(self, flat_indices: np.ndarray) -> np.ndarray:
+        """
+        One-hot encodes a batch of drawn bids without creating Bid objects.
+
+        @return matrix with one row per index and the encoder's columns
+        """
+        positions = self.table.positions(flat_indices)
+        matrix = np.zeros((len(positions), self.encoder.num_columns))
+        if self.encoder.bias:
+            matrix[:, 0] = 1.0
+        rows = np.arange(len(positions)).reshape(-1, 1)
+        matrix[rows, positions + np.array(self.encoder.offsets)] = 1.0
+        return matrix
+
+    def nearest(self, utility: float) -> Bid:
+        """
+        @return a bid with the utility closest to the given utility
+        """
+        utility = float(utility)
+        position = int(np.searchsorted(self._sorted_utilities, utility))
+        candidates = [p for p in (position - 1, position) if 0 <= p < len(self._sorted_utilities)]
+        best = min(candidates, key=lambda p: abs(self._sorted_utilities[p] - utility))
+        return self.encoder.decode(int(self._sorted_indices[best]))
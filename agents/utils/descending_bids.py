@@ -0,0 +1,127 @@
+from collections.abc import Sequence
+from decimal import Decimal
+from heapq import heappop, heappush
+from typing import Iterator, List, Tuple
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.utils.bid_encoder import BidEncoder
+
+
+def descending_bids(
+    profile: LinearAdditive, encoder: BidEncoder = None
+) -> Iterator[Tuple[Bid, Decimal]]:
+    """
+    Enumerates all bids of a LinearAdditive profile in descending utility
+    order, best first, without sorting the bid space.
+
+    The values of every issue are ranked on their weighted utility. A bid is
+    then a vector of ranks, and raising one rank never increases the utility.
+    Starting from the all-best bid, a priority queue holds the frontier of
+    candidates; popping the best one and pushing its successors yields the
+    bids in order. A successor only raises ranks from the last raised issue
+    onwards, so every bid is pushed exactly once. Producing the k best bids
+    costs O(k * issues * log(k * issues)) instead of O(n log n) for the whole
+    space.
+
+    Utilities are exact Decimal sums of weight * value utility, so the order is
+    the one of profile.getUtility. The order of bids with equal utility is
+    unspecified.
+
+    @param profile the profile to enumerate the bids of
+    @param encoder encoder of the profile's domain, a new one is created if
+        omitted
+    @return generator of (bid, utility) tuples
+    """
+    encoder = BidEncoder(profile.getDomain()) if encoder is None else encoder
+    weights = profile.getWeights()
+    utilities = profile.getUtilities()
+
+    # per issue: the value positions ranked on descending utility, and their
+    # weighted utilities in the same order
+    ranked_positions: List[List[int]] = []
+    ranked_utilities: List[List[Decimal]] = []
+    for issue, values in zip(encoder.issues, encoder.values):
+        weighted = [weights[issue] * utilities[issue].getUtility(v) for v in values]
+        order = sorted(range(len(values)), key=lambda i: -weighted[i])
+        ranked_positions.append(order)
+        ranked_utilities.append([weighted[i] for i in order])
+
+    num_issues = len(encoder.issues)
+    if num_issues == 0:
+        return
+
+    ranks = (0,) * num_issues
+    utility = sum(ranked[0] for ranked in ranked_utilities)
+    flat_index = sum(
+        ranked[0] * stride for ranked, stride in zip(ranked_positions, encoder.strides)
+    )
+    # (negated utility, flat index, ranks, first issue that may be raised)
+    heap = [(-utility, flat_index, ranks, 0)]
+    while heap:
+        negated, flat_index, ranks, first = heappop(heap)
+        yield encoder.decode(flat_index), -negated
+
+        for i in range(first, num_issues):
+            rank = ranks[i]
+            if rank + 1 == len(ranked_positions[i]):
+                continue
+            child_negated = (
+                negated + ranked_utilities[i][rank] - ranked_utilities[i][rank + 1]
+            )
+            child_index = flat_index + encoder.strides[i] * (
+                ranked_positions[i][rank + 1] - ranked_positions[i][rank]
+            )
+            child_ranks = ranks[:i] + (rank + 1,) + ranks[i + 1:]
+            heappush(heap, (child_negated, child_index, child_ranks, i))
+
+
+class DescendingBidList(Sequence):
+    """
+    Read-only list of all bids of a LinearAdditive profile, sorted on
+    descending utility. It is a drop-in for sorting the whole AllBidsList when
+    only the first bids are read: bids are produced by descending_bids on
+    first access and kept, so reading index k costs O(k log k) the first time
+    and O(1) afterwards.
+    """
+
+    def __init__(self, profile: LinearAdditive, encoder: BidEncoder = None):
+        """
+        @param profile the profile to sort the bids of
+        @param encoder encoder of the profile's domain, a new one is created if
+            omitted
+        """
+        encoder = BidEncoder(profile.getDomain()) if encoder is None else encoder
+        self._size = encoder.size
+        self._iterator = descending_bids(profile, encoder)
+        self._bids: List[Bid] = []
+        self._utilities: List[Decimal] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Bid:
+        return self._bids[self._produce(index)]
+
+    def utility(self, index: int) -> Decimal:
+        """
+        @return the utility of the bid at the given index
+        """
+        return self._utilities[self._produce(index)]
+
+    def _produce(self, index: int) -> int:
+        """
+        Enumerates bids until the given index is available.
+
+        @return the index made non-negative
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("bid index out of range")
+        while len(self._bids) <= index:
+            bid, utility = next(self._iterator)
+            self._bids.append(bid)
+            self._utilities.append(utility)
+        return index
@@ -0,0 +1,240 @@
+from bisect import bisect_right
+from decimal import Decimal
+from math import inf
+from typing import Dict, List, Optional, Tuple
+
+from geniusweb.actions.Action import Action
+from geniusweb.actions.Offer import Offer
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+from geniusweb.opponentmodel.OpponentModel import OpponentModel
+from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
+from geniusweb.progress.Progress import Progress
+from geniusweb.references.Parameters import Parameters
+from geniusweb.utils import HASH, toStr, val
+
+
+class FrequencyHistory:
+    '''
+    Versioned value counts, shared by all models derived from each other
+    through {@link FrequencyOpponentModel#WithAction}. The version of a count is
+    the number of bids that had been received when it was written.
+    <p>
+    For every issue value the history holds the list of (version, count)
+    pairs, so recording a bid appends one pair per issue and the counts of any
+    older version remain readable.
+    '''
+
+    def __init__(self, freqs: Dict[str, Dict[Value, int]], total: int):
+        '''
+        @param freqs the frequencies at version total
+        @param total the number of bids contained in freqs
+        '''
+        self.head = total
+        self._entries: Dict[str, Dict[Value, List[Tuple[int, int]]]] = {
+            issue: {value: [(total, count)] for value, count in counts.items()}
+            for issue, counts in freqs.items()
+        }
+
+    def count(self, issue: str, value: Value, version: int) -> int:
+        '''
+        @return the number of bids up to the given version that contained the
+                value for the issue
+        '''
+        entries = self._entries.get(issue, {}).get(value)
+        if not entries:
+            return 0
+        if entries[-1][0] <= version:
+            return entries[-1][1]
+        index = bisect_right(entries, (version, inf)) - 1
+        return entries[index][1] if index >= 0 else 0
+
+    def counts(self, issue: str, version: int) -> Dict[Value, int]:
+        '''
+        @return the values that were used up to the given version with their
+                number of occurrences
+        '''
+        counts = {}
+        for value in self._entries.get(issue, {}):
+            count = self.count(issue, value, version)
+            if count > 0:
+                counts[value] = count
+        return counts
+
+    def record(self, bid: Bid, issues):
+        '''
+        Adds a bid as the next version. Only allowed on the head version.
+
+        @param bid the received bid
+        @param issues the issues to count the values of
+        '''
+        version = self.head + 1
+        for issue in issues:
+            value = bid.getValue(issue)
+            if value is None:
+                continue
+            entries = self._entries.setdefault(issue, {}).setdefault(value, [])
+            previous = entries[-1][1] if entries else 0
+            entries.append((version, previous + 1))
+        self.head = version
+
+
+class FrequencyOpponentModel(UtilitySpace, OpponentModel):
+    '''
+    Drop-in replacement for geniusweb's FrequencyOpponentModel with the same
+    API and the same utilities.
+    <p>
+    The geniusweb model deep-copies its complete frequency map in every
+    {@link #WithAction} and recomputes each fraction in {@link #getUtility}.
+    This model keeps its counts in a {@link FrequencyHistory} that it shares
+    with the model it was derived from, so WithAction costs O(issues). The
+    Decimal fractions are cached per model.
+    <p>
+    immutable.
+    '''
+
+    _DECIMALS = 4  # accuracy of our computations.
+
+    def __init__(self, domain: Optional[Domain],
+                 freqs: Optional[Dict[str, Dict[Value, int]]], total: int,
+                 resBid: Optional[Bid], history: FrequencyHistory = None):
+        '''
+        internal constructor. DO NOT USE, see create. Assumes the freqs keyset is
+        equal to the available issues.
+
+        @param domain  the domain. Should not be None
+        @param freqs   the observed frequencies for all issue values. Ignored
+                       if a history is given.
+        @param total   the total number of bids contained in the freqs map.
+        @param resBid  the reservation bid. Can be null
+        @param history the shared counts to read at version total, or None to
+                       start a new history from freqs
+        '''
+        if history is None:
+            history = FrequencyHistory(freqs, total)
+            self._issues: List[str] = list(freqs.keys())
+        else:
+            self._issues = [] if domain is None else list(domain.getIssues())
+        self._domain = domain
+        self._history = history
+        self._totalBids = total
+        self._resBid = resBid
+
+        self._fractions: Dict[Tuple[str, Value], Decimal] = {}
+        self._frequencies: Dict[str, Dict[Value, int]] = None
+
+    @classmethod
+    def create(cls) -> "FrequencyOpponentModel":
+        return cls(None, {}, 0, None)
+
+    # Override
+    def With(self, newDomain: Domain, newResBid: Optional[Bid]) -> "FrequencyOpponentModel":
+        if newDomain == None:
+            raise ValueError("domain is not initialized")
+        # FIXME merge already available frequencies?
+        return type(self)(newDomain, {iss: {} for iss in newDomain.getIssues()}, 0, newResBid)
+
+    # Override
+    def getUtility(self, bid: Bid) -> Decimal:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return Decimal(1)
+        sum = Decimal(0)
+        # Assume all issues have equal weight.
+        for issue in val(self._domain).getIssues():
+            if issue in bid.getIssues():
+                sum = sum + self._getFraction(issue, val(bid.getValue(issue)))
+        return round(sum / len(self._issues), FrequencyOpponentModel._DECIMALS)
+
+    # Override
+    def getName(self) -> str:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        return "FreqOppModel" + str(hash(self)) + "For" + str(self._domain)
+
+    # Override
+    def getDomain(self) -> Domain:
+        return val(self._domain)
+
+    # Override
+    def WithAction(self, action: Action, progress: Progress) -> "FrequencyOpponentModel":
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+
+        if not isinstance(action, Offer):
+            return self
+
+        history = self._history
+        if history.head != self._totalBids:
+            # a newer model was already derived from this one, continue on a
+            # private copy so that model stays valid
+            history = FrequencyHistory(self._bidFrequencies, self._totalBids)
+        history.record(action.getBid(), self._domain.getIssues())
+
+        return type(self)(self._domain, None, self._totalBids + 1, self._resBid, history)
+
+    @property
+    def _bidFrequencies(self) -> Dict[str, Dict[Value, int]]:
+        '''
+        the observed frequencies for all issue values, built on first access.
+        Must not be modified.
+        '''
+        if self._frequencies is None:
+            self._frequencies = {
+                issue: self._history.counts(issue, self._totalBids)
+                for issue in self._issues
+            }
+        return self._frequencies
+
+    def getCounts(self, issue: str) -> Dict[Value, int]:
+        '''
+        @param issue the issue to get frequency info for
+        @return a map containing a map of values and the number of times that
+                value was used in previous bids. Values that are possible but not
+                in the map have frequency 0.
+        '''
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if not issue in self._issues:
+            return {}
+        return self._history.counts(issue, self._totalBids)
+
+    # Override
+    def WithParameters(self, parameters: Parameters) -> OpponentModel:
+        return self  # ignore parameters
+
+    def _getFraction(self, issue: str, value: Value) -> Decimal:
+        '''
+        @param issue the issue to check
+        @param value the value to check
+        @return the fraction of the total cases that bids contained given value
+                for the issue.
+        '''
+        if self._totalBids == 0:
+            return Decimal(1)
+        key = (issue, value)
+        if key not in self._fractions:
+            freq = self._history.count(issue, value, self._totalBids)
+            self._fractions[key] = round(Decimal(freq) / self._totalBids, FrequencyOpponentModel._DECIMALS)
+        return self._fractions[key]
+
+    # Override
+    def getReservationBid(self) -> Optional[Bid]:
+        return self._resBid
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and \
+            self._domain == other._domain and \
+            self._bidFrequencies == other._bidFrequencies and \
+            self._totalBids == other._totalBids and \
+            self._resBid == other._resBid
+
+    def __hash__(self):
+        return HASH((self._domain, self._bidFrequencies, self._totalBids, self._resBid))
+
+    # Override
+    def __repr__(self) -> str:
+        return "FrequencyOpponentModel[" + str(self._totalBids) + "," + \
+            toStr(self._bidFrequencies) + "]"
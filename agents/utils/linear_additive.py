@@ -0,0 +1,85 @@
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Tuple
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.utils.descending_bids import descending_bids
+
+
+def _extreme_bid(profile: LinearAdditive, best: bool) -> Tuple[Bid, Decimal]:
+    """
+    The utility of a linear additive profile is a weighted sum over the
+    issues, so the best (worst) bid takes the best (worst) value of every
+    issue independently. This costs O(issues * values) instead of a scan
+    over the bid space.
+
+    @param profile the profile to find the extreme bid of
+    @param best True for the best bid, False for the worst
+    @return the bid and its utility. Ties are broken towards the first value
+        of each value set.
+    """
+    domain = profile.getDomain()
+    weights = profile.getWeights()
+    utilities = profile.getUtilities()
+
+    issue_values: Dict[str, Value] = {}
+    utility = Decimal(0)
+    for issue in domain.getIssues():
+        extreme_value = None
+        extreme_utility = None
+        for value in domain.getValues(issue):
+            value_utility = utilities[issue].getUtility(value)
+            if (
+                extreme_utility is None
+                or (best and value_utility > extreme_utility)
+                or (not best and value_utility < extreme_utility)
+            ):
+                extreme_value = value
+                extreme_utility = value_utility
+        issue_values[issue] = extreme_value
+        utility += weights[issue] * extreme_utility
+    return Bid(issue_values), utility
+
+
+def best_bid(profile: LinearAdditive) -> Bid:
+    """
+    @return the bid with the highest utility in the profile's domain
+    """
+    return _extreme_bid(profile, True)[0]
+
+
+def worst_bid(profile: LinearAdditive) -> Bid:
+    """
+    @return the bid with the lowest utility in the profile's domain
+    """
+    return _extreme_bid(profile, False)[0]
+
+
+def utility_range(profile: LinearAdditive) -> Tuple[Decimal, Decimal]:
+    """
+    @return the exact (minimum, maximum) utility over all bids of the
+        profile's domain
+    """
+    return _extreme_bid(profile, False)[1], _extreme_bid(profile, True)[1]
+
+
+def kth_best_bid(profile: LinearAdditive, k: int) -> Tuple[Bid, Decimal]:
+    """
+    Finds the k-th best bid by best-first enumeration, see descending_bids.
+    Costs O(k log k); bids with equal utility are counted separately. Callers
+    that read many ranks, like agent52, use a DescendingBidList instead, which
+    keeps the bids of the same enumeration.
+
+    @param profile the profile to rank the bids of
+    @param k the rank of the bid, 0 is the best bid
+    @return the bid and its utility
+    @raises IndexError if the domain has k bids or fewer
+    """
+    if k < 0:
+        raise IndexError("k must be non-negative")
+    for bid_utility in islice(descending_bids(profile), k, k + 1):
+        return bid_utility
+    raise IndexError("domain has no bid of rank " + str(k))
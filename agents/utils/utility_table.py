@@ -0,0 +1,115 @@
+from collections.abc import Sequence
+from typing import List, Union
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.utils.bid_encoder import BidEncoder
+
+
+class UtilityTable:
+    """
+    Float compilation of a LinearAdditive profile.
+
+    For every issue it holds the weighted utility of each value as a numpy
+    array indexed by the value positions of a BidEncoder. Utilities of many
+    bids are then computed with array lookups instead of Decimal arithmetic on
+    Bid objects. Bids are addressed by the encoder's mixed radix index, so the
+    whole bid space can be evaluated without creating a single Bid.
+    """
+
+    def __init__(self, profile: LinearAdditive, encoder: BidEncoder = None):
+        """
+        @param profile the profile to compile
+        @param encoder encoder defining the value positions, a new one is
+            created for the profile's domain if omitted
+        """
+        self.profile = profile
+        self.encoder = BidEncoder(profile.getDomain()) if encoder is None else encoder
+
+        weights = profile.getWeights()
+        utilities = profile.getUtilities()
+        self.weighted: List[np.ndarray] = [
+            np.array(
+                [float(weights[issue] * utilities[issue].getUtility(v)) for v in values]
+            )
+            for issue, values in zip(self.encoder.issues, self.encoder.values)
+        ]
+
+        self._all_utilities: np.ndarray = None
+        self._descending: np.ndarray = None
+
+    def utility(self, bid: Bid) -> float:
+        """
+        @return the utility of a single bid as float
+        """
+        return sum(w[i] for w, i in zip(self.weighted, self.encoder.index(bid)))
+
+    def positions(self, flat_indices: np.ndarray) -> np.ndarray:
+        """
+        @param flat_indices mixed radix bid indices (see BidEncoder.flat_index)
+        @return integer matrix with the value position of every issue, one row
+            per index
+        """
+        flat_indices = np.asarray(flat_indices, dtype=np.int64).reshape(-1, 1)
+        strides = np.array(self.encoder.strides, dtype=np.int64)
+        num_values = np.array(self.encoder.num_values, dtype=np.int64)
+        return (flat_indices // strides) % num_values
+
+    def utilities(self, positions: np.ndarray) -> np.ndarray:
+        """
+        @param positions value positions, one row per bid (see positions and
+            BidEncoder.ordinal_many)
+        @return the utility of every row
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        total = np.zeros(positions.shape[0])
+        for i, weighted in enumerate(self.weighted):
+            total += weighted[positions[:, i]]
+        return total
+
+    def all_utilities(self) -> np.ndarray:
+        """
+        @return the utility of every bid in the domain, indexed by the mixed
+            radix bid index. Computed once and cached.
+        """
+        if self._all_utilities is None:
+            self._all_utilities = self.utilities(
+                self.positions(np.arange(self.encoder.size))
+            )
+        return self._all_utilities
+
+    def descending(self) -> np.ndarray:
+        """
+        @return the mixed radix indices of all bids, sorted on descending
+            utility. Computed once and cached.
+        """
+        if self._descending is None:
+            self._descending = np.argsort(-self.all_utilities(), kind="stable")
+        return self._descending
+
+    def bids(self, flat_indices: np.ndarray) -> "BidSequence":
+        """
+        @return a lazy sequence with the bids at the given indices
+        """
+        return BidSequence(self.encoder, flat_indices)
+
+
+class BidSequence(Sequence):
+    """
+    Read-only list of bids backed by an array of mixed radix indices. Bids are
+    decoded (and cached by the encoder) only when they are accessed.
+    """
+
+    def __init__(self, encoder: BidEncoder, flat_indices: np.ndarray):
+        self._encoder = encoder
+        self.indices = np.asarray(flat_indices, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return BidSequence(self._encoder, self.indices[item])
+        return self._encoder.decode(int(self.indices[item]))
@@ -1,34 +1,36 @@
-import json
+import numpy as np
 import matplotlib.pyplot as plt
 
-with open("agent_storage/TemplateAgent/data.json") as f:
-    data = json.load(f)
+data = np.load("agent_storage/TemplateAgent/data.npz")
 
-received = data["received_bids"]
-sent = data["sent_bids"]
+received_rounds = data["received_round"]
+received_utilities = data["received_utility"]
+sent_rounds = data["sent_round"]
+sent_utilities = data["sent_utility"]
+sent_opponent_utilities = data["sent_opponent_utility"]
 
 plt.figure(figsize=(10, 6))
 
 plt.plot(
-    [r["round"] for r in received],
-    [r["utility"] for r in received],
+    received_rounds,
+    received_utilities,
     "ro-", label="Utility of Opponent's Offers to Agent"
 )
 
 plt.plot(
-    [s["round"] for s in sent],
-    [s["utility"] for s in sent],
+    sent_rounds,
+    sent_utilities,
     "bo-", label="Agent's Offers (Agent's Utility)"
 )
 
-if "predicted_opponent_utility" in sent[0]:
+if len(sent_opponent_utilities) > 0 and not np.isnan(sent_opponent_utilities).all():
     plt.plot(
-        [s["round"] for s in sent],
-        [s["predicted_opponent_utility"] for s in sent],
+        sent_rounds,
+        sent_opponent_utilities,
         "go--", label="Agent's Offers (Predicted Opponent Utility)"
     )
 
-plt.axhline(data["reservation_value"], color="gray", linestyle="--", label="Reservation Value")
+plt.axhline(float(data["reservation_value"]), color="gray", linestyle="--", label="Reservation Value")
 plt.title("Negotiation Timeline")
 plt.xlabel("Round")
 plt.ylabel("Utility")
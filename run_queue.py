@@ -0,0 +1,27 @@
+import sys
+
+from run_tournament import save_results, tournament_settings
+from utils.work_queue import QueueWorker, export_queue, merge_queue
+
+# Runs the tournament of run_tournament.py through a work queue directory on a filesystem that is shared by all
+# machines, no other infrastructure is needed:
+#   python run_queue.py export <queue_dir>   write the sessions of the tournament to a new queue
+#   python run_queue.py work <queue_dir>     claim and run sessions until none are left, start any number of these
+#                                            on any machine that has the queue directory mounted
+#   python run_queue.py merge <queue_dir>    collect the finished sessions into a results directory
+USAGE = "usage: python run_queue.py export|work|merge <queue_dir>"
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "work", "merge"):
+        print(USAGE)
+        sys.exit(1)
+    command, queue_dir = sys.argv[1], sys.argv[2]
+
+    if command == "export":
+        num_sessions = export_queue(tournament_settings, queue_dir)
+        print(f"Exported {num_sessions} negotiation sessions to {queue_dir}")
+    elif command == "work":
+        num_run = QueueWorker(queue_dir).run()
+        print(f"Queue finished, this worker ran {num_run} negotiation sessions")
+    else:
+        save_results(*merge_queue(queue_dir))
@@ -3,18 +3,27 @@ import os
 from pathlib import Path
 import time
 
-from utils.runners import run_tournament
-
-RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
-
-# create results directory if it does not exist
-if not RESULTS_DIR.exists():
-    RESULTS_DIR.mkdir(parents=True)
+from utils.runners import run_adaptive_tournament, run_tournament
 
 # Settings to run a negotiation session:
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+#   Optionally, sessions can run in parallel on "num_workers" processes (default 1). Session wall times are recorded in a
+#   cost model ("cost_model_path", default results/cost_model.json) that is used to predict and schedule later tournaments.
+#   To spread a tournament over several machines, export it to a work queue on a shared filesystem, see run_queue.py.
+#   Optionally, "isolation" runs every session in a worker subprocess that is killed when it runs "kill_after_s" past the
+#   deadline or exceeds "rss_limit_mb" of memory, and is replaced after "sessions_per_worker" sessions, e.g.
+#   "isolation": {"kill_after_s": 30, "rss_limit_mb": 4096, "sessions_per_worker": 20} (or True for the defaults).
+#   Optionally, "warm_workers": True imports all agent modules once in a fork server and forks a fresh worker process
+#   from it for every session, so sessions start without importing heavy agent dependencies again.
+#   Optionally, "adaptive" runs the profile sets as rounds and stops evaluating agents that are statistically out of the
+#   top "keep" agents, e.g. "adaptive": {"keep": 8, "metric": "utility", "confidence": 0.95, "min_sessions": 10}.
+#   Optionally, "design" replaces the full round-robin by a sampled schedule in which every agent meets "opponents" random
+#   opponents per profile set on both sides, e.g. "design": {"opponents": 4, "seed": 0}. The number of sessions is then
+#   linear in the number of agents, the summary reports standard errors (se_*) next to the averages, computed from the
+#   agent's mean per opponent. In adaptive rounds with an odd number of agents left, an odd number of opponents is lowered
+#   by 1 (1 is raised to 2).
 tournament_settings = {
     "agents": [
         {
@@ -120,16 +129,30 @@ tournament_settings = {
         ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
     ],
     "deadline_time_ms": 10000,
+    "num_workers": 1,
 }
 
-# run a session and obtain results in dictionaries
-tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
 
-# save the tournament settings for reference
-with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(tournament_steps, indent=2))
-# save the tournament results
-with open(RESULTS_DIR.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(tournament_results, indent=2))
-# save the tournament results summary
-tournament_results_summary.to_csv(RESULTS_DIR.joinpath("tournament_results_summary.csv"))
+def save_results(tournament_steps, tournament_results, tournament_results_summary):
+    results_dir = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+
+    # create results directory if it does not exist
+    if not results_dir.exists():
+        results_dir.mkdir(parents=True)
+
+    # save the tournament settings for reference
+    with open(results_dir.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_steps, indent=2))
+    # save the tournament results
+    with open(results_dir.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_results, indent=2))
+    # save the tournament results summary
+    tournament_results_summary.to_csv(results_dir.joinpath("tournament_results_summary.csv"))
+
+
+if __name__ == "__main__":
+    # run a session and obtain results in dictionaries
+    if "adaptive" in tournament_settings:
+        save_results(*run_adaptive_tournament(tournament_settings))
+    else:
+        save_results(*run_tournament(tournament_settings))
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+from utils import runners
+
+PROFILE_SETS = [
+    [f"domains/domain0{i}/profileA.json", f"domains/domain0{i}/profileB.json"]
+    for i in range(3)
+]
+
+
+def fake_session(settings):
+    # Agent0-2 always get 0, the others 0.5 +- 0.25 depending on the opponent, so the first round
+    # only drops Agent0-2 and leaves an odd number of agents
+    names = [runners.agent_name(agent) for agent in settings["agents"]]
+    numbers = [int(name[len("Agent"):]) for name in names]
+    utilities = [
+        0.0 if number < 3 else 0.5 + (0.25 if (number + opponent) % 2 else -0.25)
+        for number, opponent in zip(numbers, reversed(numbers))
+    ]
+    return {}, {
+        "num_offers": 1,
+        "agent_1": names[0],
+        "agent_2": names[1],
+        "utility_1": utilities[0],
+        "utility_2": utilities[1],
+        "nash_product": utilities[0] * utilities[1],
+        "social_welfare": sum(utilities),
+        "result": "agreement",
+    }
+
+
+class AdaptiveDesignTest(unittest.TestCase):
+    def run_adaptive(self, num_agents, design, keep):
+        with tempfile.TemporaryDirectory() as cost_model_dir:
+            tournament_settings = {
+                "agents": [{"class": f"agents.fake.Agent{i}"} for i in range(num_agents)],
+                "profile_sets": PROFILE_SETS,
+                "deadline_time_ms": 1000,
+                "cost_model_path": str(Path(cost_model_dir, "cost_model.json")),
+                "design": design,
+                "adaptive": {"keep": keep, "min_sessions": 2},
+            }
+            with mock.patch.object(runners, "run_session", fake_session):
+                return runners.run_adaptive_tournament(tournament_settings)
+
+    def test_odd_opponents_after_elimination_to_odd_agents(self):
+        # round 1 runs 10 agents with 3 opponents, round 2 the 7 agents that are left
+        tournament_steps, tournament_results, summary = self.run_adaptive(10, {"opponents": 3, "seed": 0}, keep=3)
+
+        self.assertEqual(len(tournament_steps), len(tournament_results))
+        self.assertNotIn(None, tournament_results)
+        self.assertEqual(
+            set(summary.index[summary["eliminated_round"] == 1]), {"Agent0", "Agent1", "Agent2"}
+        )
+        # within a round, every agent plays the same number of sessions on both sides:
+        # 3 opponents with 10 agents, lowered to 2 with 7 agents
+        for profiles, num_agents, opponents in ((PROFILE_SETS[0], 10, 3), (PROFILE_SETS[1], 7, 2)):
+            round_steps = [step for step in tournament_steps if step["profiles"] == profiles]
+            for position in range(2):
+                counts = Counter(runners.agent_name(step["agents"][position]) for step in round_steps)
+                self.assertEqual(len(counts), num_agents)
+                self.assertEqual(set(counts.values()), {opponents})
+
+    def test_adaptive_round_settings(self):
+        agents = [{"class": f"agents.fake.Agent{i}"} for i in range(7)]
+        for opponents, expected in ((3, 2), (1, 2), (4, 4)):
+            settings = runners.adaptive_round_settings({"design": {"opponents": opponents}}, agents, [])
+            self.assertEqual(settings["design"]["opponents"], expected)
+            runners.create_tournament_steps(dict(settings, profile_sets=PROFILE_SETS[:1], deadline_time_ms=1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
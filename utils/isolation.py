@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import time
+import traceback
+from multiprocessing.context import BaseContext
+from typing import Tuple
+
+# Isolated execution: every session runs in a worker subprocess that the runner kills when
+# it exceeds the wall-clock limit (deadline plus kill_after_s) or the resident memory cap.
+# A killed or crashed session gets an "ERROR" summary instead of stalling the tournament.
+# Workers are recycled after a number of sessions to bound memory fragmentation and leaks.
+KILL_AFTER_S = 30
+SESSIONS_PER_WORKER = 20
+POLL_INTERVAL_S = 0.1
+
+
+def _worker_main(connection):
+    # runs sessions received over the pipe until it receives None
+    from utils.runners import run_session
+
+    while True:
+        settings = connection.recv()
+        if settings is None:
+            return
+        try:
+            results_trace, results_summary = run_session(settings)
+            connection.send(("ok", results_trace, results_summary))
+        except Exception:
+            connection.send(("exception", traceback.format_exc(), None))
+
+
+def rss_bytes(pid: int) -> int:
+    # resident set size of a process, 0 where /proc is not available
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def error_summary(settings: dict, error: str, message: str) -> dict:
+    # summary of a session without outcome, in the format of process_results
+    results_summary = {"num_offers": 0}
+    for position, agent in enumerate(settings["agents"], start=1):
+        results_summary[f"agent_{position}"] = agent["class"].split(".")[-1]
+        results_summary[f"utility_{position}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+    results_summary["error"] = error
+    results_summary["error_message"] = message
+    return results_summary
+
+
+class IsolatedSessionRunner:
+    """Runs sessions like run_session, but each in a worker subprocess.
+
+    Args:
+        kill_after_s (float, optional): seconds after the session deadline at which the
+            worker is killed. Defaults to 30.
+        rss_limit_mb (float, optional): resident memory at which the worker is killed,
+            None for no cap. Only enforced where /proc is available. Defaults to None.
+        sessions_per_worker (int, optional): sessions after which the worker is replaced
+            by a fresh process. Defaults to 20.
+        context (BaseContext, optional): multiprocessing context to start workers with,
+            see utils.warm_pool. Defaults to the default context.
+    """
+
+    def __init__(
+        self,
+        kill_after_s: float = KILL_AFTER_S,
+        rss_limit_mb: float = None,
+        sessions_per_worker: int = SESSIONS_PER_WORKER,
+        context: BaseContext = None,
+    ):
+        self.kill_after_s = kill_after_s
+        self.rss_limit_mb = rss_limit_mb
+        self.sessions_per_worker = sessions_per_worker
+        self.context = context or multiprocessing.get_context()
+
+        self._process = None
+        self._connection = None
+        self._sessions = 0
+
+    def run(self, settings: dict) -> Tuple[dict, dict]:
+        if self._process is None:
+            self._start()
+        self._sessions += 1
+
+        time_limit = settings["deadline_time_ms"] / 1000 + self.kill_after_s
+        rss_limit = None if self.rss_limit_mb is None else self.rss_limit_mb * 2**20
+        start = time.monotonic()
+        self._connection.send(settings)
+
+        while not self._connection.poll(POLL_INTERVAL_S):
+            if not self._process.is_alive():
+                # the worker may have sent its result right before dying
+                if self._connection.poll():
+                    break
+                exitcode = self._process.exitcode
+                self._stop(kill=True)
+                return {}, error_summary(
+                    settings, "crash", f"worker exited with code {exitcode}"
+                )
+            elapsed = time.monotonic() - start
+            if elapsed > time_limit:
+                self._stop(kill=True)
+                return {}, error_summary(
+                    settings, "timeout", f"killed after {elapsed:.1f}s"
+                )
+            if rss_limit is not None:
+                rss = rss_bytes(self._process.pid)
+                if rss > rss_limit:
+                    self._stop(kill=True)
+                    return {}, error_summary(
+                        settings, "memory", f"killed at {rss / 2**20:.0f} MB resident"
+                    )
+
+        try:
+            status, results_trace, results_summary = self._connection.recv()
+        except EOFError:
+            self._stop(kill=True)
+            return {}, error_summary(settings, "crash", "worker closed the connection")
+
+        if self._sessions >= self.sessions_per_worker:
+            self._stop()
+        if status != "ok":
+            return {}, error_summary(settings, status, results_trace)
+        return results_trace, results_summary
+
+    def close(self):
+        if self._process is not None:
+            self._stop()
+
+    def kill(self):
+        # kill the worker from another thread, a session that is running in it ends as a crash
+        process = self._process
+        if process is not None and process.is_alive():
+            process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        self._connection, child_connection = self.context.Pipe()
+        self._process = self.context.Process(
+            target=_worker_main, args=(child_connection,), daemon=True
+        )
+        self._process.start()
+        child_connection.close()
+        self._sessions = 0
+
+    def _stop(self, kill: bool = False):
+        if kill:
+            self._process.kill()
+        else:
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self._process.join(timeout=None if kill else KILL_AFTER_S)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
@@ -1,9 +1,17 @@
+import multiprocessing
+import random
 import shutil
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from itertools import permutations
-from math import factorial, prod
+from math import isnan, prod, sqrt
+from multiprocessing.context import BaseContext
 from pathlib import Path
-from typing import Tuple
+from statistics import NormalDist
+from typing import Iterator, Tuple
 
 import pandas as pd
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
@@ -21,6 +29,18 @@ from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
 from utils.ask_proceed import ask_proceed
+from utils.isolation import POLL_INTERVAL_S, IsolatedSessionRunner
+from utils.warm_pool import tournament_context
+from utils.scheduler import (
+    DEFAULT_COST_MODEL_PATH,
+    SessionCostModel,
+    domain_size,
+    format_duration,
+    longest_first,
+)
+
+# ask for confirmation when a tournament is predicted to take longer than this
+CONFIRM_WALL_TIME_S = 15 * 60
 
 
 def run_session(settings) -> Tuple[dict, dict]:
@@ -104,45 +124,387 @@ def run_session(settings) -> Tuple[dict, dict]:
 
 
 def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
-    # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
-    agents = tournament_settings["agents"]
-    profile_sets = tournament_settings["profile_sets"]
-    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    cost_model = tournament_cost_model(tournament_settings)
+
+    tournament_steps = create_tournament_steps(tournament_settings)
+    confirm_wall_time(tournament_settings, tournament_steps, cost_model)
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(
-        profile_sets
+    context = tournament_context(tournament_settings)
+    tournament_results = run_tournament_steps(tournament_settings, tournament_steps, cost_model, context)
+    tournament_results_summary = process_tournament_results(tournament_results)
+
+    return tournament_steps, tournament_results, tournament_results_summary
+
+
+def run_adaptive_tournament(tournament_settings: dict) -> Tuple[list, list]:
+    # Tournament in rounds that stops evaluating agents once they are statistically out of the top.
+    # Every round runs the sessions of one profile set between the agents that are still in the race.
+    # After a round, agents whose confidence interval of the average metric lies entirely below the
+    # lower bound of the keep-th best agent are dropped, so later rounds only run close contenders.
+    # Settings in tournament_settings["adaptive"]:
+    #   "keep": number of top agents to identify, default half of the agents
+    #   "metric": "utility" or "nash_product" to rank the agents on, default "utility"
+    #   "confidence": confidence level of the intervals, default 0.95
+    #   "min_sessions": sessions an agent plays before it can be dropped, default 10
+    # With a sampled design, every round samples the schedule of the agents that are still in the race
+    adaptive = tournament_settings.get("adaptive") or {}
+    agents = tournament_settings["agents"]
+    keep = adaptive.get("keep", (len(agents) + 1) // 2)
+    metric = adaptive.get("metric", "utility")
+    confidence = adaptive.get("confidence", 0.95)
+    min_sessions = adaptive.get("min_sessions", 10)
+    assert metric in ("utility", "nash_product")
+
+    cost_model = tournament_cost_model(tournament_settings)
+    # running every round with all agents is the worst case
+    all_steps = create_tournament_steps(
+        adaptive_round_settings(tournament_settings, agents, tournament_settings["profile_sets"])
     )
-    if num_sessions > 100:
-        message = (
-            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
+    confirm_wall_time(tournament_settings, all_steps, cost_model, "at most ")
+
+    # the fork server of warm workers preloads the modules of all agents once, for every round
+    context = tournament_context(tournament_settings)
+
+    active = list(agents)
+    eliminated_round = {}
+    tournament_steps = []
+    tournament_results = []
+    for round_number, profiles in enumerate(tournament_settings["profile_sets"], start=1):
+        if len(active) <= keep:
+            break
+
+        round_steps = create_tournament_steps(adaptive_round_settings(tournament_settings, active, [profiles]))
+        tournament_steps.extend(round_steps)
+        tournament_results.extend(run_tournament_steps(tournament_settings, round_steps, cost_model, context))
+
+        intervals = confidence_intervals(tournament_results, confidence)
+        dropped = eliminate_agents(
+            [agent_name(agent) for agent in active], intervals, metric, keep, min_sessions
         )
-        if not ask_proceed(message):
+        for name in dropped:
+            eliminated_round[name] = round_number
+        active = [agent for agent in active if agent_name(agent) not in dropped]
+        print(
+            f"Round {round_number}: {len(round_steps)} sessions, dropped {len(dropped)}, "
+            f"{len(active)} agents left"
+        )
+
+    tournament_results_summary = process_tournament_results(tournament_results)
+
+    # add the confidence intervals and the round in which agents were dropped (0 if never)
+    intervals = confidence_intervals(tournament_results, confidence)
+    for name in ("utility", "nash_product"):
+        for i, bound in ((1, "low"), (2, "high")):
+            tournament_results_summary[f"avg_{name}_{bound}"] = [
+                intervals[agent][name][i] for agent in tournament_results_summary.index
+            ]
+    tournament_results_summary["eliminated_round"] = [
+        eliminated_round.get(agent, 0) for agent in tournament_results_summary.index
+    ]
+
+    return tournament_steps, tournament_results, tournament_results_summary
+
+
+def adaptive_round_settings(tournament_settings: dict, agents: list, profile_sets: list) -> dict:
+    # tournament settings of an adaptive round. Elimination can leave any number of agents, so an odd number
+    # of opponents in a sampled design is lowered by 1 when the number of agents is odd as well (raised to 2
+    # instead of lowered to 0), see sampled_agent_duos
+    settings = dict(tournament_settings, agents=agents, profile_sets=profile_sets)
+    design = tournament_settings.get("design")
+    if design and design["opponents"] % 2 == 1 and len(agents) % 2 == 1:
+        opponents = design["opponents"] - 1 if design["opponents"] > 1 else 2
+        settings["design"] = dict(design, opponents=opponents)
+    return settings
+
+
+def confidence_intervals(tournament_results: list, confidence: float) -> dict:
+    # per agent and metric ("utility", "nash_product") the (mean, low, high, number of sessions) of the
+    # normal approximation confidence interval of the mean over the sessions of the agent, see clustered_mean
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    intervals = {}
+    for agent_class, metrics in agent_samples(tournament_results).items():
+        intervals[agent_class] = {}
+        for name, clusters in metrics.items():
+            mean, standard_error, n = clustered_mean(clusters)
+            half_width = float("inf") if isnan(standard_error) else z * standard_error
+            intervals[agent_class][name] = (mean, mean - half_width, mean + half_width, n)
+    return intervals
+
+
+def agent_samples(tournament_results: list) -> dict:
+    # per agent and metric ("utility", "nash_product") the values of the agent's sessions, grouped by opponent
+    samples = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    for session_results in tournament_results:
+        agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
+        for agent_id, agent_class in agents.items():
+            opponent = next(v for k, v in agents.items() if k != agent_id)
+            samples[agent_class]["utility"][opponent].append(
+                session_results[f"utility_{agent_id.split('_')[1]}"]
+            )
+            samples[agent_class]["nash_product"][opponent].append(session_results["nash_product"])
+    return samples
+
+
+def clustered_mean(clusters: dict) -> Tuple[float, float, int]:
+    # mean over the sessions in clusters (opponent -> values) with its standard error and the number of sessions.
+    # The sessions against one opponent share that opponent and, for the side-swapped pair, the domain, so they
+    # are not independent: the standard error is computed from the means per opponent, nan below 2 opponents
+    values = [value for cluster in clusters.values() for value in cluster]
+    n = len(values)
+    mean = sum(values) / n
+    cluster_means = [sum(cluster) / len(cluster) for cluster in clusters.values()]
+    m = len(cluster_means)
+    if m < 2:
+        return mean, float("nan"), n
+    cluster_mean = sum(cluster_means) / m
+    variance = sum((c - cluster_mean) ** 2 for c in cluster_means) / (m - 1)
+    return mean, sqrt(variance / m), n
+
+
+def eliminate_agents(names: list, intervals: dict, metric: str, keep: int, min_sessions: int) -> set:
+    # agents whose upper bound is below the cutoff: the lower bound of the keep-th best agent.
+    # The keep agents with the highest lower bounds are never below the cutoff themselves
+    if len(names) <= keep:
+        return set()
+    lows = sorted((intervals[name][metric][1] for name in names), reverse=True)
+    cutoff = lows[keep - 1]
+    return {
+        name
+        for name in names
+        if intervals[name][metric][3] >= min_sessions and intervals[name][metric][2] < cutoff
+    }
+
+
+def agent_name(agent: dict) -> str:
+    # the name under which an agent appears in the session summaries
+    return agent["class"].split(".")[-1]
+
+
+def confirm_wall_time(
+    tournament_settings: dict, tournament_steps: list, cost_model: SessionCostModel, bound: str = ""
+):
+    # predict the wall time of the tournament and ask for confirmation if it is long
+    num_workers = tournament_settings.get("num_workers", 1)
+    _, wall_time = longest_first(
+        predict_session_costs(tournament_steps, cost_model), num_workers
+    )
+
+    message = (
+        f"this would run {bound}{len(tournament_steps)} negotiation sessions on {num_workers} "
+        f"worker(s), predicted wall time {bound}{format_duration(wall_time)}"
+    )
+    if wall_time > CONFIRM_WALL_TIME_S:
+        if not ask_proceed(f"WARNING: {message}. Proceed?"):
             print("Exiting script")
             exit()
+    else:
+        print(message[0].upper() + message[1:])
+
+
+def run_tournament_steps(
+    tournament_settings: dict,
+    tournament_steps: list,
+    cost_model: SessionCostModel,
+    context: BaseContext = None,
+) -> list:
+    # run sessions with the workers of the tournament settings, returns their summaries in the order of the steps.
+    # context is the multiprocessing context of the tournament (see utils.warm_pool.tournament_context), created
+    # once per tournament by the caller
+    num_workers = tournament_settings.get("num_workers", 1)
+    session_costs = predict_session_costs(tournament_steps, cost_model)
+    # start the longest sessions first to keep the workers evenly loaded until the end
+    order, _ = longest_first(session_costs, num_workers)
+
+    tournament_results = [None] * len(tournament_steps)
+    jobs = [(i, tournament_steps[i]) for i in order]
+    finished = run_sessions(
+        jobs,
+        num_workers,
+        tournament_settings.get("isolation"),
+        context,
+    )
+    for index, session_results_summary, seconds in finished:
+        # assemble results in the order of the tournament steps
+        tournament_results[index] = session_results_summary
+
+        # update the cost model after every session, so interrupted tournaments still add to it
+        record_session_cost(cost_model, tournament_steps[index], seconds)
+        cost_model.save()
+
+    return tournament_results
+
+
+def create_tournament_steps(tournament_settings: dict) -> list:
+    # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
+    # With a sampled design (tournament_settings["design"]) every agent plays against a fixed number of opponents per
+    # profile set instead, see sampled_agent_duos
+    agents = tournament_settings["agents"]
+    profile_sets = tournament_settings["profile_sets"]
+    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    design = tournament_settings.get("design")
 
-    tournament_results = []
     tournament_steps = []
     for profiles in profile_sets:
         # quick an dirty check
         assert isinstance(profiles, list) and len(profiles) == 2
-        for agent_duo in permutations(agents, 2):
+        if design:
+            agent_duos = sampled_agent_duos(agents, design["opponents"], design_random(design, profiles))
+        else:
+            agent_duos = permutations(agents, 2)
+        for agent_duo in agent_duos:
             # create session settings dict
             settings = {
                 "agents": list(agent_duo),
                 "profiles": profiles,
                 "deadline_time_ms": deadline_time_ms,
             }
+            tournament_steps.append(settings)
 
-            # run a single negotiation session
-            _, session_results_summary = run_session(settings)
+    return tournament_steps
+
+
+def sampled_agent_duos(agents: list, opponents: int, rng: random.Random) -> list:
+    # Balanced incomplete schedule for one profile set: every agent meets exactly `opponents` others, on both
+    # sides, so the number of sessions is linear in the number of agents. The agents are placed on a circle in
+    # random order and meet their opponents // 2 nearest neighbours on either side, plus the opposite agent if
+    # opponents is odd. Every opponent is equally likely, so the averages of an agent estimate its averages of
+    # the full round-robin without bias.
+    num_agents = len(agents)
+    if opponents >= num_agents - 1:
+        return list(permutations(agents, 2))
+    if opponents < 1:
+        raise ValueError(f"a sampled design needs at least 1 opponent, got {opponents}")
+    if opponents % 2 == 1 and num_agents % 2 == 1:
+        raise ValueError(
+            f"every agent cannot meet an odd number of opponents ({opponents}) with an odd number of agents ({num_agents})"
+        )
 
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
+    circle = list(agents)
+    rng.shuffle(circle)
+    offsets = list(range(1, opponents // 2 + 1))
+    pairs = [(i, (i + offset) % num_agents) for offset in offsets for i in range(num_agents)]
+    if opponents % 2 == 1:
+        pairs += [(i, i + num_agents // 2) for i in range(num_agents // 2)]
 
-    tournament_results_summary = process_tournament_results(tournament_results)
+    agent_duos = []
+    for i, j in pairs:
+        # side-swapping: both agents play both profiles
+        agent_duos.append((circle[i], circle[j]))
+        agent_duos.append((circle[j], circle[i]))
+    return agent_duos
 
-    return tournament_steps, tournament_results, tournament_results_summary
+
+def design_random(design: dict, profiles: list) -> random.Random:
+    # random generator of the schedule of a profile set, reproducible per profile set when the design has a seed
+    if design.get("seed") is None:
+        return random.Random()
+    return random.Random(f"{design['seed']}:{profiles[0]}:{profiles[1]}")
+
+
+def tournament_cost_model(tournament_settings: dict) -> SessionCostModel:
+    return SessionCostModel(
+        tournament_settings.get("cost_model_path", DEFAULT_COST_MODEL_PATH)
+    )
+
+
+def predict_session_costs(tournament_steps: list, cost_model: SessionCostModel) -> list:
+    # predict the wall time of every session, unknown agents are assumed to use the deadline
+    return [
+        cost_model.session_cost(
+            session_agent_classes(settings),
+            domain_size(settings["profiles"][0]),
+            settings["deadline_time_ms"] / 1000,
+        )
+        for settings in tournament_steps
+    ]
+
+
+def record_session_cost(cost_model: SessionCostModel, settings: dict, seconds: float):
+    cost_model.record(
+        session_agent_classes(settings), domain_size(settings["profiles"][0]), seconds
+    )
+
+
+def run_sessions(
+    jobs: list, num_workers: int, isolation=None, context: BaseContext = None
+) -> Iterator[Tuple[int, dict, float]]:
+    # run (index, settings) jobs in the given order on num_workers workers, yields (index, summary, seconds) as they finish.
+    # With a warm context (see utils.warm_pool) every session runs in a process forked from the warm server
+    if isolation:
+        yield from run_isolated_sessions(jobs, num_workers, isolation, context)
+        return
+
+    if context is not None:
+        pool = context.Pool(num_workers, maxtasksperchild=1)
+    elif num_workers > 1:
+        pool = multiprocessing.Pool(num_workers)
+    else:
+        pool = nullcontext()
+    with pool as workers:
+        if workers is None:
+            yield from map(run_timed_session, jobs)
+        else:
+            yield from workers.imap_unordered(run_timed_session, jobs)
+
+
+def run_isolated_sessions(
+    jobs: list, num_workers: int, isolation, context: BaseContext = None
+) -> Iterator[Tuple[int, dict, float]]:
+    # every thread drives its own worker subprocess, jobs are submitted in the given order as threads become free.
+    # isolation is True for the defaults or a dict of IsolatedSessionRunner arguments
+    options = dict(isolation) if isinstance(isolation, dict) else {}
+    if context is not None:
+        # forking from the warm server is cheap, so every session gets a fresh process by default
+        options.setdefault("sessions_per_worker", 1)
+        options["context"] = context
+    local = threading.local()
+    session_runners = []
+
+    def run_job(job):
+        if not hasattr(local, "session_runner"):
+            local.session_runner = IsolatedSessionRunner(**options)
+            session_runners.append(local.session_runner)
+        return run_timed_session(job, local.session_runner.run)
+
+    executor = ThreadPoolExecutor(num_workers)
+    pending = iter(jobs)
+    running = set()
+    try:
+        while True:
+            # keep every thread busy, but do not queue more jobs than there are threads
+            for job in pending:
+                running.add(executor.submit(run_job, job))
+                if len(running) >= num_workers:
+                    break
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+    finally:
+        # on an early exit (Ctrl-C, an exception of the consumer, closing the generator) the sessions
+        # still running are killed instead of waited for. Their threads notice the dead worker and return
+        executor.shutdown(wait=False, cancel_futures=True)
+        while running:
+            for session_runner in list(session_runners):
+                session_runner.kill()
+            _, running = wait(running, timeout=POLL_INTERVAL_S)
+        executor.shutdown()
+        for session_runner in session_runners:
+            session_runner.close()
+
+
+def run_timed_session(job: Tuple[int, dict], run=None) -> Tuple[int, dict, float]:
+    # run a single negotiation session (with run_session by default) and measure its wall time,
+    # top-level so worker processes can run it
+    index, settings = job
+    start = time.perf_counter()
+    _, session_results_summary = (run or run_session)(settings)
+    return index, session_results_summary, time.perf_counter() - start
+
+
+def session_agent_classes(settings: dict) -> list:
+    return [agent["class"] for agent in settings["agents"]]
 
 
 def process_results(results_class: SAOPState, results_dict: dict):
@@ -239,16 +601,22 @@ def process_tournament_results(tournament_results):
                 )
             tournament_results_summary[agent_class][session_results["result"]] += 1
 
+    samples = agent_samples(tournament_results)
     for agent, stats in agent_result_raw.items():
         num_session = len(stats["utility"])
         for desc, stat in stats.items():
             stat_average = sum(stat) / num_session
             tournament_results_summary[agent][f"avg_{desc}"] = stat_average
+        # standard errors of the averages, clustered by opponent
+        for desc, clusters in samples[agent].items():
+            tournament_results_summary[agent][f"se_{desc}"] = clustered_mean(clusters)[1]
         tournament_results_summary[agent]["count"] = num_session
 
     column_order = [
         "avg_utility",
+        "se_utility",
         "avg_nash_product",
+        "se_nash_product",
         "avg_social_welfare",
         "avg_num_offers",
         "count",
@@ -267,7 +635,10 @@ def process_tournament_results(tournament_results):
     tournament_results_summary = pd.DataFrame(tournament_results_summary).T
 
     # clean data and types
-    tournament_results_summary = tournament_results_summary.fillna(0)
+    # (standard errors of agents with a single opponent stay undefined)
+    tournament_results_summary = tournament_results_summary.fillna(
+        {c: 0 for c in tournament_results_summary.columns if not c.startswith("se_")}
+    )
     for column in column_order:
         if column not in tournament_results_summary:
             tournament_results_summary[column] = 0
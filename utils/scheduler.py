@@ -0,0 +1,92 @@
+import heapq
+import json
+from functools import lru_cache
+from math import prod
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_COST_MODEL_PATH = Path("results", "cost_model.json")
+
+
+@lru_cache(maxsize=None)
+def domain_size(profile_path: str) -> int:
+    """Number of bids in the domain of a profile file, read from the issue values
+    in the profile json without loading it through geniusweb."""
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    issues_values = profile["LinearAdditiveUtilitySpace"]["domain"]["issuesValues"]
+    return prod(len(issue["values"]) for issue in issues_values.values())
+
+
+def size_bucket(size: int) -> int:
+    """Domains are grouped by size on a power of 2 scale, so the costs measured on
+    one domain generalise to domains of similar size."""
+    return size.bit_length()
+
+
+class SessionCostModel:
+    """Persistent estimates of the wall time of negotiation sessions.
+
+    Every session's wall time is recorded for both of its agents, keyed by the agent
+    class and the size bucket of the domain. A session is predicted to take as long
+    as the slower of its two agents: the mean time of that agent's sessions on
+    domains of that size. Agents without measurements on a bucket fall back to their
+    mean over all buckets and then to the default cost.
+    """
+
+    def __init__(self, path: Path = DEFAULT_COST_MODEL_PATH):
+        self.path = Path(path)
+        # agent class -> size bucket (str, json keys) -> [number of sessions, total seconds]
+        self.costs: Dict[str, Dict[str, List[float]]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.costs = json.load(f)
+
+    def record(self, agent_classes: List[str], size: int, seconds: float):
+        bucket = str(size_bucket(size))
+        for agent_class in agent_classes:
+            entry = self.costs.setdefault(agent_class, {}).setdefault(bucket, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def agent_cost(self, agent_class: str, size: int, default: float) -> float:
+        buckets = self.costs.get(agent_class)
+        if not buckets:
+            return default
+        entry = buckets.get(str(size_bucket(size)))
+        if entry is None:
+            count = sum(e[0] for e in buckets.values())
+            total = sum(e[1] for e in buckets.values())
+            return total / count
+        return entry[1] / entry[0]
+
+    def session_cost(self, agent_classes: List[str], size: int, default: float) -> float:
+        return max(self.agent_cost(c, size, default) for c in agent_classes)
+
+    def save(self):
+        if not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.costs, indent=2, sort_keys=True))
+
+
+def longest_first(costs: List[float], num_workers: int) -> Tuple[List[int], float]:
+    """Longest processing time first scheduling.
+
+    Jobs are started in descending cost order, each on the worker that becomes free
+    first, which is what a worker pool does with the jobs in this order.
+
+    Returns:
+        the job indices in start order and the predicted makespan
+    """
+    order = sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)
+    loads = [0.0] * max(1, min(num_workers, len(costs)))
+    for i in order:
+        heapq.heapreplace(loads, loads[0] + costs[i])
+    return order, max(loads)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
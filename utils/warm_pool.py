@@ -0,0 +1,73 @@
+import multiprocessing
+import subprocess
+import sys
+from multiprocessing.context import BaseContext
+
+# Warm workers: a fork server process imports the runner and every agent module of the
+# tournament once, and each worker process is forked from it. Workers then start without
+# importing the heavy dependency stacks of agents (pandas, sklearn, lightgbm, ...) again.
+RUNNER_MODULES = ["utils.runners", "utils.isolation"]
+
+# imports the modules given as arguments one by one and reports each on its own line
+CHECK_IMPORTS_SCRIPT = """
+import importlib, sys
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+        status = "ok"
+    except Exception:
+        status = "failed"
+    print(f"warm_pool:{status}:{name}", flush=True)
+"""
+
+
+def agent_modules(tournament_settings: dict) -> list:
+    return sorted({agent["class"].rsplit(".", 1)[0] for agent in tournament_settings["agents"]})
+
+
+def importable_modules(modules: list) -> list:
+    # the modules that import without error, tried in a throwaway interpreter. The fork server only
+    # skips preload modules that raise ImportError, any other error at import time kills it and with
+    # it every session of the tournament
+    importable = []
+    remaining = list(modules)
+    while remaining:
+        result = subprocess.run(
+            [sys.executable, "-c", CHECK_IMPORTS_SCRIPT, *remaining],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        reports = [
+            line.split(":", 2)[1:] for line in result.stdout.splitlines() if line.startswith("warm_pool:")
+        ]
+        for status, name in reports:
+            if status == "ok":
+                importable.append(name)
+            else:
+                print(f"WARNING: {name} fails to import, it is not preloaded by the warm workers")
+        if len(reports) == len(remaining):
+            break
+        # the interpreter exited while importing the next module, check the modules after it again
+        print(f"WARNING: importing {remaining[len(reports)]} exits the interpreter, it is not preloaded by the warm workers")
+        remaining = remaining[len(reports) + 1:]
+    return importable
+
+
+def warm_context(tournament_settings: dict) -> BaseContext:
+    # multiprocessing context whose processes fork from a server that preloaded the agent modules,
+    # None where the forkserver start method is not available (Windows)
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        print("WARNING: warm workers are not supported on this platform, using the default start method")
+        return None
+    context = multiprocessing.get_context("forkserver")
+    # modules that fail to import are not preloaded, their sessions import them as usual
+    context.set_forkserver_preload(importable_modules(RUNNER_MODULES + agent_modules(tournament_settings)))
+    return context
+
+
+def tournament_context(tournament_settings: dict) -> BaseContext:
+    # the multiprocessing context for the worker processes of a tournament, None for the default
+    if tournament_settings.get("warm_workers"):
+        return warm_context(tournament_settings)
+    return None
@@ -0,0 +1,280 @@
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Tuple
+
+from utils.isolation import IsolatedSessionRunner, error_summary
+from utils.warm_pool import tournament_context
+from utils.runners import (
+    create_tournament_steps,
+    predict_session_costs,
+    process_tournament_results,
+    record_session_cost,
+    run_timed_session,
+    tournament_cost_model,
+)
+
+# A work queue is a directory on a filesystem shared by all workers:
+#   queue.json            tournament settings, sessions and the order to claim them in
+#   leases/<index>.lease  claim of a running session, its mtime is the heartbeat
+#   results/<index>.json  summary and wall time of a finished session
+# Files are created exclusively (O_EXCL) or replaced atomically (os.replace), so no broker
+# is needed. A lease whose heartbeat is older than the timeout is taken over by another
+# worker, so sessions run at least once. A duplicate run just replaces the result.
+QUEUE_FILE = "queue.json"
+COSTS_RECORDED_FILE = "costs_recorded.json"
+LEASE_TIMEOUT_S = 120
+HEARTBEAT_INTERVAL_S = 10
+POLL_INTERVAL_S = 5
+
+
+def export_queue(tournament_settings: dict, queue_dir) -> int:
+    # write the sessions of a tournament to a new queue directory, returns the number of sessions
+    queue_dir = Path(queue_dir)
+    if queue_dir.joinpath(QUEUE_FILE).exists():
+        raise FileExistsError(f"{queue_dir} already contains a work queue")
+
+    tournament_steps = create_tournament_steps(tournament_settings)
+    session_costs = predict_session_costs(
+        tournament_steps, tournament_cost_model(tournament_settings)
+    )
+    # workers claim the longest sessions first
+    order = sorted(
+        range(len(tournament_steps)), key=lambda i: session_costs[i], reverse=True
+    )
+
+    queue_dir.joinpath("leases").mkdir(parents=True, exist_ok=True)
+    queue_dir.joinpath("results").mkdir(parents=True, exist_ok=True)
+    write_json_atomic(
+        queue_dir.joinpath(QUEUE_FILE),
+        {
+            "tournament_settings": tournament_settings,
+            "tournament_steps": tournament_steps,
+            "order": order,
+            "predicted_costs": session_costs,
+        },
+    )
+    return len(tournament_steps)
+
+
+class QueueWorker:
+    def __init__(
+        self,
+        queue_dir,
+        worker_id: str = None,
+        lease_timeout: float = LEASE_TIMEOUT_S,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL_S,
+        poll_interval: float = POLL_INTERVAL_S,
+    ):
+        self.queue_dir = Path(queue_dir)
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+
+        self.leases_dir = self.queue_dir.joinpath("leases")
+        self.results_dir = self.queue_dir.joinpath("results")
+
+    def run(self) -> int:
+        # claim and run sessions until every session has a result, returns the number run by this worker
+        queue = read_json(self.queue_dir.joinpath(QUEUE_FILE))
+
+        # run the sessions in a worker subprocess if the tournament asks for isolation,
+        # forked from a warm server if it asks for warm workers
+        tournament_settings = queue["tournament_settings"]
+        isolation = tournament_settings.get("isolation")
+        context = tournament_context(tournament_settings)
+        session_runner = None
+        if isolation or context is not None:
+            options = dict(isolation) if isinstance(isolation, dict) else {}
+            if context is not None:
+                options.setdefault("sessions_per_worker", 1)
+                options["context"] = context
+            session_runner = IsolatedSessionRunner(**options)
+
+        try:
+            return self.run_sessions(queue, session_runner)
+        finally:
+            if session_runner is not None:
+                session_runner.close()
+
+    def run_sessions(self, queue: dict, session_runner: IsolatedSessionRunner = None) -> int:
+        tournament_steps = queue["tournament_steps"]
+        run = None if session_runner is None else session_runner.run
+
+        num_run = 0
+        while True:
+            finished = set(os.listdir(self.results_dir))
+            remaining = [i for i in queue["order"] if result_name(i) not in finished]
+            if not remaining:
+                return num_run
+
+            index = next((i for i in remaining if self.claim(i)), None)
+            if index is None:
+                # every remaining session is leased, wait for results or expired leases
+                time.sleep(self.poll_interval)
+                continue
+
+            try:
+                # the session may have finished between listing the results and claiming it
+                if self.results_dir.joinpath(result_name(index)).exists():
+                    continue
+                start = time.perf_counter()
+                try:
+                    with self.heartbeat(index):
+                        _, session_results_summary, seconds = run_timed_session(
+                            (index, tournament_steps[index]), run
+                        )
+                except Exception:
+                    # a failing session is finished with an error result, otherwise every worker
+                    # would claim it in turn and die on it
+                    session_results_summary = error_summary(
+                        tournament_steps[index], "exception", traceback.format_exc()
+                    )
+                    seconds = time.perf_counter() - start
+                write_json_atomic(
+                    self.results_dir.joinpath(result_name(index)),
+                    {
+                        "index": index,
+                        "summary": session_results_summary,
+                        "seconds": seconds,
+                        "worker": self.worker_id,
+                    },
+                )
+                num_run += 1
+            finally:
+                self.release(index)
+
+    def claim(self, index: int) -> bool:
+        lease = self.leases_dir.joinpath(lease_name(index))
+        try:
+            fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not self.take_over(lease):
+                return False
+            try:
+                fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return False
+
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"worker": self.worker_id, "claimed": time.time()}))
+        return True
+
+    def take_over(self, lease: Path) -> bool:
+        # remove an expired lease, only one of the workers that find it expired can move it away
+        if not self.expired(lease):
+            return False
+        stale = lease.with_name(f"{lease.name}.{self.worker_id}.stale")
+        try:
+            os.rename(lease, stale)
+        except FileNotFoundError:
+            return False
+        if not self.expired(stale):
+            # another worker replaced the lease in the meantime, put its lease back
+            try:
+                os.link(stale, lease)
+            except FileExistsError:
+                pass
+            os.unlink(stale)
+            return False
+        os.unlink(stale)
+        return True
+
+    def expired(self, lease: Path) -> bool:
+        try:
+            return time.time() - lease.stat().st_mtime > self.lease_timeout
+        except FileNotFoundError:
+            return False
+
+    def release(self, index: int):
+        # remove the lease if it is still ours
+        lease = self.leases_dir.joinpath(lease_name(index))
+        try:
+            if read_json(lease).get("worker") == self.worker_id:
+                os.unlink(lease)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @contextmanager
+    def heartbeat(self, index: int):
+        # touch the lease while the session runs, so other workers do not take it over
+        lease = self.leases_dir.joinpath(lease_name(index))
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_interval):
+                try:
+                    os.utime(lease)
+                except FileNotFoundError:
+                    pass
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def merge_queue(queue_dir) -> Tuple[list, list, object]:
+    # collect the finished sessions of a queue into tournament steps, results and summary
+    queue_dir = Path(queue_dir)
+    queue = read_json(queue_dir.joinpath(QUEUE_FILE))
+    all_steps = queue["tournament_steps"]
+
+    results = {}
+    for name in os.listdir(queue_dir.joinpath("results")):
+        if name.endswith(".json"):
+            result = read_json(queue_dir.joinpath("results", name))
+            results[result["index"]] = result
+    indices = sorted(results)
+    if len(indices) < len(all_steps):
+        print(f"WARNING: {len(all_steps) - len(indices)} of {len(all_steps)} sessions have no result yet")
+
+    # add the wall times to the cost model, once per session
+    recorded_path = queue_dir.joinpath(COSTS_RECORDED_FILE)
+    recorded = set(read_json(recorded_path)) if recorded_path.exists() else set()
+    cost_model = tournament_cost_model(queue["tournament_settings"])
+    for index in indices:
+        if index not in recorded:
+            record_session_cost(cost_model, all_steps[index], results[index]["seconds"])
+            recorded.add(index)
+    cost_model.save()
+    write_json_atomic(recorded_path, sorted(recorded))
+
+    tournament_steps = [all_steps[i] for i in indices]
+    tournament_results = [results[i]["summary"] for i in indices]
+    tournament_results_summary = process_tournament_results(tournament_results)
+
+    return tournament_steps, tournament_results, tournament_results_summary
+
+
+def lease_name(index: int) -> str:
+    return f"{index:06d}.lease"
+
+
+def result_name(index: int) -> str:
+    return f"{index:06d}.json"
+
+
+def read_json(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: Path, data):
+    # write to a temporary file next to the target and move it in place, readers never see partial files
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:6]}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2))
+    os.replace(temporary, path)